@@ -75,6 +75,13 @@ asab.Config.add_defaults({
 
 		# Length of the `state` string generated by the Redirect URI storage
 		"redirect_state_length": "16",
+
+		# Validity period of local cookie session cache.
+		# The cache is only invalidated by session changes made on this instance.
+		# In deployments with more than one instance, a session that is logged out or revoked
+		# on another instance keeps authenticating here for up to this long.
+		# Set to "0" to disable cache.
+		"session_cache_expiration": "0",
 	},
 
 	"seacat:api": {
@@ -164,7 +171,20 @@ asab.Config.add_defaults({
 		# Space-separated list of factor types of which the user must have at least one
 		# Leave empty to disable second factor enforcement
 		# Available factor types: "totp", "smscode"
-		"enforce_factors": ""
+		"enforce_factors": "",
+
+		# How long a verified M2M (Basic auth) password is trusted without checking it against the stored hash.
+		# Credentials changes made on this instance invalidate the cache immediately,
+		# changes made on other instances only take effect after this period.
+		# Set to "0" to disable cache.
+		"m2m_password_cache_expiration": "0",
+
+		# Validity period of the local M2M session cache.
+		# The cache is only invalidated by session changes made on this instance.
+		# In deployments with more than one instance, a session that is deleted
+		# on another instance keeps authorizing here for up to this long.
+		# Set to "0" to disable cache.
+		"m2m_session_cache_expiration": "0",
 	},
 
 	"seacatauth:session": {
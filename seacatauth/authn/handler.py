@@ -1,4 +1,7 @@
+import asyncio
+import base64
 import datetime
+import json
 import logging
 import asab
 import asab.web.rest
@@ -6,6 +9,7 @@ import asab.exceptions
 import aiohttp.web
 import urllib.parse
 import jwcrypto.jwk
+import cryptography.hazmat.primitives.asymmetric.ec
 
 from ..models.const import ResourceId
 from .. import exceptions, AuditLogger, generic
@@ -17,6 +21,88 @@ from . import schema
 
 L = logging.getLogger(__name__)
 
+_UTC = datetime.timezone.utc
+_now = datetime.datetime.now
+
+_FAILED_LOGIN_BODY = json.dumps({"result": "FAILED"}).encode("utf-8")
+_OK_BODY = json.dumps({"result": "OK"}).encode("utf-8")
+_IMPERSONATE_REDIRECT_BODY = b"""<!doctype html>\n<html lang="en">\n<head></head><body>...</body>\n</html>\n"""
+
+
+def _failed_login_response():
+	return aiohttp.web.Response(body=_FAILED_LOGIN_BODY, status=401, content_type="application/json")
+
+
+def _ok_response():
+	return aiohttp.web.Response(body=_OK_BODY, content_type="application/json")
+
+
+def _compact_json_response(data):
+	# Without indentation and custom encoder class, json.dumps runs entirely on its C encoder
+	return aiohttp.web.Response(body=json.dumps(data).encode("utf-8"), content_type="application/json")
+
+
+_EC_CURVES = {
+	"P-256": cryptography.hazmat.primitives.asymmetric.ec.SECP256R1,
+	"P-384": cryptography.hazmat.primitives.asymmetric.ec.SECP384R1,
+	"P-521": cryptography.hazmat.primitives.asymmetric.ec.SECP521R1,
+}
+
+
+def _b64url_to_int(value):
+	return int.from_bytes(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)), "big")
+
+
+def _load_client_login_key(jwk):
+	"""
+	Build the client's EC public key directly from JWK coordinates
+
+	Applies the same key usage constraints as jwcrypto's get_op_key("encrypt").
+	Curves that are not known here are left to jwcrypto.
+	"""
+	if jwk.get("kty") != "EC":
+		raise asab.exceptions.ValidationError("Unsupported login key type: {!r}".format(jwk.get("kty")))
+
+	curve = _EC_CURVES.get(jwk.get("crv"))
+	if curve is None:
+		return jwcrypto.jwk.JWK(**jwk).get_op_key("encrypt")
+
+	if jwk.get("use", "enc") != "enc" or (jwk.get("key_ops") and "encrypt" not in jwk["key_ops"]):
+		raise asab.exceptions.ValidationError("Login key is not allowed for encryption")
+
+	try:
+		return cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePublicNumbers(
+			_b64url_to_int(jwk["x"]),
+			_b64url_to_int(jwk["y"]),
+			curve(),
+		).public_key()
+	except ValueError as e:
+		# Also covers malformed base64 and points that are not on the curve
+		raise asab.exceptions.ValidationError("Invalid login key: {}".format(e))
+
+
+def _parse_login_query(query_string, custom_parameters):
+	"""
+	Extract custom login parameters and preferred login descriptor IDs from login URL query in a single pass
+
+	Values of other parameters are not decoded at all.
+	Blank values are skipped, same as in urllib.parse.parse_qsl.
+	"""
+	login_dict = {}
+	login_preferences = []
+	for part in query_string.split("&"):
+		key, sep, value = part.partition("=")
+		if not sep or not value:
+			continue
+		key = urllib.parse.unquote_plus(key)
+		if key == "ldid":
+			login_preferences.append(urllib.parse.unquote_plus(value))
+		elif key in custom_parameters:
+			if key in login_dict:
+				raise asab.exceptions.ValidationError("Repeated query parameters are not supported")
+			login_dict[key] = urllib.parse.unquote_plus(value)
+	return login_dict, tuple(login_preferences) or None
+
 
 class AuthenticationHandler(object):
 	"""
@@ -26,8 +112,12 @@ class AuthenticationHandler(object):
 	tags: ["Login and authentication"]
 	"""
 
+	# Login payloads larger than this (in bytes) are encrypted and decrypted outside the event loop
+	CryptoOffloadThreshold = 64 * 1024
+
 	def __init__(self, app, authn_svc):
 		self.App = app
+		self.ProactorService = app.get_service("asab.ProactorService")
 		self.AuthenticationService = authn_svc
 		self.CredentialsService = app.get_service("seacatauth.CredentialsService")
 		self.SessionService = app.get_service("seacatauth.SessionService")
@@ -36,21 +126,20 @@ class AuthenticationHandler(object):
 		self.CommunicationService = app.get_service("seacatauth.CommunicationService")
 
 		web_app = app.WebContainer.WebApp
-		web_app.router.add_put("/public/login.prologue", self.login_prologue)
-		web_app.router.add_put("/public/login/{lsid}", self.login)
-		web_app.router.add_put("/public/login/{lsid}/smslogin", self.prepare_smslogin_challenge)
-		web_app.router.add_put("/public/login/{lsid}/webauthn", self.prepare_webauthn_login_challenge)
-		web_app.router.add_put("/public/logout", self.logout)
 		web_app.router.add_put("/account/impersonate", self.impersonate)
 		web_app.router.add_post("/account/impersonate", self.impersonate_and_redirect)
 
-		# Public endpoints
-		web_app_public = app.PublicWebContainer.WebApp
-		web_app_public.router.add_put("/public/login.prologue", self.login_prologue)
-		web_app_public.router.add_put("/public/login/{lsid}", self.login)
-		web_app_public.router.add_put("/public/login/{lsid}/smslogin", self.prepare_smslogin_challenge)
-		web_app_public.router.add_put("/public/login/{lsid}/webauthn", self.prepare_webauthn_login_challenge)
-		web_app_public.router.add_put("/public/logout", self.logout)
+		# Public endpoints (available in both containers)
+		public_routes = (
+			("/public/login.prologue", self.login_prologue),
+			("/public/login/{lsid}", self.login),
+			("/public/login/{lsid}/smslogin", self.prepare_smslogin_challenge),
+			("/public/login/{lsid}/webauthn", self.prepare_webauthn_login_challenge),
+			("/public/logout", self.logout),
+		)
+		for router in (web_app.router, app.PublicWebContainer.WebApp.router):
+			for path, handler in public_routes:
+				router.add_put(path, handler)
 
 
 	@asab.web.rest.json_schema_handler(schema.LOGIN_PROLOGUE)
@@ -67,28 +156,23 @@ class AuthenticationHandler(object):
 		- Store the login data in a new LoginSession object
 		- Respond with login session ID, encryption key and available login descriptors
 		"""
-		key = jwcrypto.jwk.JWK.from_json(await request.read())
+		# Client login key must be an EC key suitable for ECDH
+		client_public_key = _load_client_login_key(json_data)
 		ident = json_data.get("ident")
 		login_session_id = json_data.get("lsid")
 
 		# Get arguments specified in login URL query
 		login_preferences = None
 		query_string = json_data.get("qs")
+		custom_login_parameters = self.AuthenticationService.CustomLoginParameters
 		if query_string is None:
 			login_dict = None
-		else:
-			query_dict = urllib.parse.parse_qs(query_string)
-
+		elif len(custom_login_parameters) == 0 and "ldid=" not in query_string:
+			# Fast path: There is nothing to extract from the query
 			login_dict = {}
-			for k, v in query_dict.items():
-				if k in self.AuthenticationService.CustomLoginParameters:
-					if len(v) > 1:
-						raise asab.exceptions.ValidationError("Repeated query parameters are not supported")
-					login_dict[k] = v[0]
-
-			# Get preferred login descriptor IDs
-			# TODO: This option should be moved to client config or removed completely
-			login_preferences = query_dict.get("ldid")
+		else:
+			# TODO: Preferred login descriptor IDs should be moved to client config or removed completely
+			login_dict, login_preferences = _parse_login_query(query_string, custom_login_parameters)
 
 		if login_session_id:
 			login_session = await self.AuthenticationService.get_login_session(login_session_id)
@@ -99,7 +183,7 @@ class AuthenticationHandler(object):
 			login_session = await self.AuthenticationService.prepare_seacat_login(
 				login_session=login_session,
 				ident=ident,
-				client_public_key=key.get_op_key("encrypt"),
+				client_public_key=client_public_key,
 				request_headers=request.headers,
 				login_dict=login_dict,
 				login_preferences=login_preferences
@@ -108,19 +192,17 @@ class AuthenticationHandler(object):
 			login_session = await self.AuthenticationService.prepare_failed_seacat_login(
 				login_session=login_session,
 				ident=ident,
-				client_public_key=key.get_op_key("encrypt")
+				client_public_key=client_public_key
 			)
 
-		key = jwcrypto.jwk.JWK.from_pyca(login_session.SeacatLogin.ServerPublicKey)
-
 		response = {
 			"lsid": login_session.Id,
 			"lds": [
 				descriptor.serialize()
 				for descriptor in login_session.SeacatLogin.LoginDescriptors],
-			"key": key.export_public(as_dict=True),
+			"key": login_session.SeacatLogin.ServerPublicKeyJwk,
 		}
-		return asab.web.rest.json_response(request, response)
+		return _compact_json_response(response)
 
 
 	async def login(self, request):
@@ -144,11 +226,7 @@ class AuthenticationHandler(object):
 			L.log(asab.LOG_NOTICE, "Login failed: Invalid login session ID", struct_data={
 				"lsid": lsid
 			})
-			return asab.web.rest.json_response(
-				request,
-				data={"result": "FAILED"},
-				status=401
-			)
+			return _failed_login_response()
 
 		if login_session.SeacatLogin.LoginAttemptsLeft <= 0:
 			await self.AuthenticationService.delete_login_session(lsid)
@@ -157,18 +235,18 @@ class AuthenticationHandler(object):
 				"ident": login_session.Ident,
 				"cid": login_session.CredentialsId
 			})
-			return asab.web.rest.json_response(
-				request,
-				data={"result": "FAILED"},
-				status=401
-			)
-
-		login_session = await self.AuthenticationService.update_login_session(
-			login_session,
-			login_attempts_left=login_session.SeacatLogin.LoginAttemptsLeft - 1
+			return _failed_login_response()
+
+		# Record the login attempt while the request body is being read
+		login_session, encrypted_body = await asyncio.gather(
+			self.AuthenticationService.update_login_session(
+				login_session,
+				login_attempts_left=login_session.SeacatLogin.LoginAttemptsLeft - 1
+			),
+			request.read(),
 		)
 
-		request_data = login_session.decrypt(await request.read())
+		request_data = await self._decrypt(login_session, encrypted_body)
 		L.debug("Processing login attempt", struct_data={"payload": request_data, "lsid": login_session.Id})
 
 		request_data["request_headers"] = request.headers
@@ -184,16 +262,12 @@ class AuthenticationHandler(object):
 				"ident": login_session.SeacatLogin.Ident,
 				"from_ip": access_ips
 			})
-			await self.AuthenticationService.LastActivityService.update_last_activity(
+			self.AuthenticationService.LastActivityService.update_last_activity_nowait(
 				EventCode.LOGIN_FAILED, login_session.SeacatLogin.CredentialsId, from_ip=access_ips)
 
 			self.AuthenticationService.LoginCounter.add("failed", 1)
 
-			return asab.web.rest.json_response(
-				request,
-				data={"result": "FAILED"},
-				status=401
-			)
+			return _failed_login_response()
 
 		# If there already is a root session with the same credentials ID, refresh it instead of creating a new one
 		if request.Session is not None and request.Session.Credentials.Id == login_session.SeacatLogin.CredentialsId:
@@ -214,18 +288,12 @@ class AuthenticationHandler(object):
 		}
 
 		response = aiohttp.web.Response(
-			body=login_session.SeacatLogin.encrypt(body)
+			body=await self._encrypt(login_session, body)
 		)
 
-		cookie_domain = None
 		if hasattr(login_session.SeacatLogin, "ClientId"):
-			client_svc = self.App.get_service("seacatauth.ClientService")
-			try:
-				client = await client_svc.get(login_session.ClientId)
-				cookie_domain = client.get("cookie_domain")
-			except KeyError:
-				L.error("Client not found.", struct_data={"client_id": login_session.ClientId})
-		if cookie_domain is None:
+			cookie_domain = await self._get_cookie_domain(login_session.ClientId)
+		else:
 			cookie_domain = self.CookieService.RootCookieDomain
 
 		self.CookieService.set_session_cookie(
@@ -261,7 +329,7 @@ class AuthenticationHandler(object):
 		if redirect_uri is not None:
 			response = aiohttp.web.HTTPFound(redirect_uri)
 		else:
-			response = asab.web.rest.json_response(request, {'result': 'OK'})
+			response = _ok_response()
 
 		self.CookieService.delete_session_cookie(response)
 
@@ -308,7 +376,7 @@ class AuthenticationHandler(object):
 			L.log(asab.LOG_NOTICE, "Seacat login not initialized", struct_data={"lsid": lsid})
 			return aiohttp.web.HTTPUnauthorized()
 
-		json_body = login_session.decrypt(await request.read())
+		json_body = await self._decrypt(login_session, await request.read())
 
 		# Initiate SMS login
 		success = False
@@ -323,7 +391,7 @@ class AuthenticationHandler(object):
 			L.error("factor_id not specified", struct_data={"factor_id": factor_id})
 
 		body = {"result": "OK" if success is True else "FAILED"}
-		return aiohttp.web.Response(body=login_session.encrypt(body))
+		return aiohttp.web.Response(body=await self._encrypt(login_session, body))
 
 
 	async def prepare_webauthn_login_challenge(self, request):
@@ -344,18 +412,18 @@ class AuthenticationHandler(object):
 			L.log(asab.LOG_NOTICE, "Seacat login not initialized", struct_data={"lsid": lsid})
 			return aiohttp.web.HTTPUnauthorized()
 
-		json_body = login_session.decrypt(await request.read())
+		json_body = await self._decrypt(login_session, await request.read())
 
 		factor_type = json_body.get("factor_type")
 		if factor_type != "webauthn":
 			body = {"result": "FAILED", "message": "Unsupported factor type."}
-			return aiohttp.web.Response(body=login_session.SeacatLogin.encrypt(body))
+			return aiohttp.web.Response(body=await self._encrypt(login_session, body))
 
 		# Webauthn challenge timeout should be the same as the current login session timeout
 		timeout = (
 			login_session.Created
 			+ self.AuthenticationService.LoginSessionExpiration
-			- datetime.datetime.now(datetime.timezone.utc)
+			- _now(_UTC)
 		).total_seconds() * 1000
 
 		webauthn_svc = self.AuthenticationService.App.get_service("seacatauth.WebAuthnService")
@@ -364,12 +432,35 @@ class AuthenticationHandler(object):
 			timeout
 		)
 
-		login_data = login_session.SeacatLogin.Data
-		login_data["webauthn"] = authentication_options
+		await self.AuthenticationService.update_login_session_data(login_session, "webauthn", authentication_options)
+
+		return aiohttp.web.Response(body=await self._encrypt(login_session, authentication_options))
+
 
-		login_session = await self.AuthenticationService.update_login_session(login_session, data=login_data)
+	async def _decrypt(self, login_session, ciphertext: bytes) -> dict:
+		if len(ciphertext) > self.CryptoOffloadThreshold:
+			return await self.ProactorService.execute(login_session.decrypt, ciphertext)
+		return login_session.decrypt(ciphertext)
 
-		return aiohttp.web.Response(body=login_session.SeacatLogin.encrypt(authentication_options))
+
+	async def _encrypt(self, login_session, plaintext: dict) -> bytes:
+		plaintext = json.dumps(plaintext).encode("utf-8")
+		if len(plaintext) > self.CryptoOffloadThreshold:
+			return await self.ProactorService.execute(login_session.encrypt, plaintext)
+		return login_session.encrypt(plaintext)
+
+
+	async def _get_cookie_domain(self, client_id):
+		"""
+		Get the client's cookie domain, falling back to the root cookie domain
+		"""
+		client_service = self.App.get_service("seacatauth.ClientService")
+		try:
+			client = await client_service.get(client_id)
+		except KeyError:
+			L.error("Client not found.", struct_data={"client_id": client_id})
+			return self.CookieService.RootCookieDomain
+		return client.get("cookie_domain") or self.CookieService.RootCookieDomain
 
 
 	async def _get_client_login_key(self, client_id):
@@ -391,10 +482,7 @@ class AuthenticationHandler(object):
 		Open an SSO session impersonated as a different user.
 		Response contains a Set-Cookie header with the new root session cookie.
 		"""
-		from_info = [request.remote]
-		ff = request.headers.get("X-Forwarded-For")
-		if ff is not None:
-			from_info.extend(ff.split(", "))
+		from_info = generic.get_request_access_ips(request)
 
 		target_cid = json_data["credentials_id"]
 		if request.Session.Session.ParentSessionId is None:
@@ -407,7 +495,7 @@ class AuthenticationHandler(object):
 		except aiohttp.web.HTTPForbidden as e:
 			return e
 
-		response = asab.web.rest.json_response(request, {"result": "OK"})
+		response = _ok_response()
 		self.CookieService.set_session_cookie(
 			response=response,
 			cookie_value=session.Cookie.Id,
@@ -457,17 +545,17 @@ class AuthenticationHandler(object):
 		oidc_service = self.App.get_service("seacatauth.OpenIdConnectService")
 		client_service = self.App.get_service("seacatauth.ClientService")
 
-		from_info = [request.remote]
-		ff = request.headers.get("X-Forwarded-For")
-		if ff is not None:
-			from_info.extend(ff.split(", "))
+		from_info = generic.get_request_access_ips(request)
 
-		request_data = await request.post()
-		target_cid = request_data["credentials_id"]
 		if request.Session.Session.Type == "root":
+			request_data = await request.post()
 			impersonator_root_session = request.Session
 		else:
-			impersonator_root_session = await self.SessionService.get(request.Session.Session.ParentSessionId)
+			request_data, impersonator_root_session = await asyncio.gather(
+				request.post(),
+				self.SessionService.get(request.Session.Session.ParentSessionId),
+			)
+		target_cid = request_data["credentials_id"]
 
 		try:
 			session = await self._impersonate(impersonator_root_session, from_info, target_cid)
@@ -487,7 +575,7 @@ class AuthenticationHandler(object):
 				"Refresh": "0;url={}".format(authorize_uri),
 			},
 			content_type="text/html",
-			text="""<!doctype html>\n<html lang="en">\n<head></head><body>...</body>\n</html>\n"""
+			body=_IMPERSONATE_REDIRECT_BODY
 		)
 		self.CookieService.set_session_cookie(
 			response=response,
@@ -523,7 +611,8 @@ class AuthenticationHandler(object):
 			})
 			raise aiohttp.web.HTTPForbidden()
 		except Exception as e:
-			AuditLogger.exception("Impersonation failed: Unexpected error ({})".format(e), struct_data={
+			AuditLogger.exception("Impersonation failed: Unexpected error", struct_data={
+				"error": str(e),
 				"impersonator_cid": impersonator_cid,
 				"impersonator_sid": impersonator_root_session.SessionId,
 				"target_cid": target_cid,
@@ -46,6 +46,8 @@ class LoginDescriptor:
 		self.Label: typing.Union[str, dict] = label
 		self.Data: dict = data
 		self.FactorGroups: typing.List[typing.List[LoginFactorABC]] = factors
+		# Serialized form is cached, descriptors are not modified after they are built
+		self._Serialized: typing.Optional[dict] = None
 
 	def __repr__(self):
 		return "LoginDescriptor[{}]".format(
@@ -108,6 +110,11 @@ class LoginDescriptor:
 		return True
 
 	def serialize(self):
+		if self._Serialized is None:
+			self._Serialized = self._serialize()
+		return self._Serialized
+
+	def _serialize(self):
 		# Flatten the factor group if there is only one (for UI compatibility)
 		if len(self.FactorGroups) == 1:
 			return {
@@ -40,8 +40,7 @@ class SMSCodeFactor(LoginFactorABC):
 		# Otherwise just resend the existing one
 		if self.Type not in login_data:
 			token = generate_ergonomic_token(length=6)
-			login_data[self.Type] = {"token": token}
-			login_session = await self.AuthenticationService.update_login_session(login_session, data=login_data)
+			await self.AuthenticationService.update_login_session_data(login_session, self.Type, {"token": token})
 		else:
 			token = login_data["token"]
 
@@ -56,7 +55,8 @@ class SMSCodeFactor(LoginFactorABC):
 		try:
 			await comm_svc.sms_login(credentials=credentials, otp=token)
 		except Exception as e:
-			L.error("Unable to send SMS login code: {}".format(e), struct_data={
+			L.error("Unable to send SMS login code", struct_data={
+				"error": str(e),
 				"cid": login_session.SeacatLogin.CredentialsId,
 				"lsid": login_session.Id,
 				"phone": phone,
@@ -5,9 +5,8 @@ import typing
 import cryptography.hazmat.backends
 import cryptography.hazmat.primitives.asymmetric.ec
 import cryptography.hazmat.primitives.serialization
-import cryptography.hazmat.primitives.ciphers
-import cryptography.hazmat.primitives.ciphers.algorithms
-import cryptography.hazmat.primitives.ciphers.modes
+import cryptography.hazmat.primitives.ciphers.aead
+import jwcrypto.jwk
 
 from .login_descriptor import LoginDescriptor
 
@@ -24,7 +23,8 @@ class SeacatLogin:
 		login_attempts_left: int,
 		shared_key: bytes,
 		server_public_key: cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePublicKey,
-		data: dict | None = None
+		data: dict | None = None,
+		server_public_key_jwk: dict | None = None,
 	):
 		self.Ident = ident
 		self.CredentialsId = credentials_id
@@ -32,6 +32,8 @@ class SeacatLogin:
 		self.LoginAttemptsLeft = login_attempts_left
 		self.__shared_key = shared_key
 		self.ServerPublicKey = server_public_key
+		self._ServerPublicKeyJwk = server_public_key_jwk
+		self._Aead = None
 
 		# Custom data needed by the login process
 		self.Data = data or {}
@@ -42,6 +44,16 @@ class SeacatLogin:
 			self.CredentialsId, self.Ident)
 
 
+	@property
+	def ServerPublicKeyJwk(self) -> dict:
+		"""
+		Public JWK of the server login key (computed once and cached if not provided at build time)
+		"""
+		if self._ServerPublicKeyJwk is None:
+			self._ServerPublicKeyJwk = jwcrypto.jwk.JWK.from_pyca(self.ServerPublicKey).export_public(as_dict=True)
+		return self._ServerPublicKeyJwk
+
+
 	@classmethod
 	def build(
 		cls,
@@ -62,13 +74,15 @@ class SeacatLogin:
 			)
 		else:
 			shared_key = None
+		server_public_key = server_login_key.public_key()
 		return cls(
 			shared_key=shared_key,
 			credentials_id=credentials_id,
 			ident=ident,
 			login_descriptors=login_descriptors,
 			login_attempts_left=login_attempts_left,
-			server_public_key=server_login_key.public_key(),
+			server_public_key=server_public_key,
+			server_public_key_jwk=jwcrypto.jwk.JWK.from_pyca(server_public_key).export_public(as_dict=True),
 		)
 
 
@@ -109,21 +123,19 @@ class SeacatLogin:
 			return None
 
 
-	def decrypt(self, ciphertext: bytes) -> dict:
-		assert self.__shared_key is not None
-		iv = ciphertext[:12]
-		message = ciphertext[12:-16]
-		tag = ciphertext[-16:]
+	def _get_aead(self) -> cryptography.hazmat.primitives.ciphers.aead.AESGCM:
+		# The AEAD object depends only on the shared key, so it can serve all requests of this login
+		if self._Aead is None:
+			self._Aead = cryptography.hazmat.primitives.ciphers.aead.AESGCM(self.__shared_key)
+		return self._Aead
 
-		# Construct a Cipher object, with the key, iv, and additionally the
-		# GCM tag used for authenticating the message.
-		decryptor = cryptography.hazmat.primitives.ciphers.Cipher(
-			cryptography.hazmat.primitives.ciphers.algorithms.AES(self.__shared_key),
-			cryptography.hazmat.primitives.ciphers.modes.GCM(iv, tag),
-			backend=cryptography.hazmat.backends.default_backend()
-		).decryptor()
 
-		return json.loads(decryptor.update(message) + decryptor.finalize())
+	def decrypt(self, ciphertext: bytes) -> dict:
+		assert self.__shared_key is not None
+		# The message is the 12-byte IV followed by the ciphertext with the 16-byte GCM tag appended
+		# Slicing a memoryview avoids copying the request body
+		message = memoryview(ciphertext)
+		return json.loads(self._get_aead().decrypt(message[:12], message[12:], None))
 
 
 	def encrypt(self, plaintext: typing.Union[str, dict, bytes]) -> bytes:
@@ -134,17 +146,7 @@ class SeacatLogin:
 			plaintext = plaintext.encode('utf-8')
 
 		iv = secrets.token_bytes(12)
-
-		# Construct a Cipher object, with the key, iv, and additionally the
-		# GCM tag used for authenticating the message.
-		encryptor = cryptography.hazmat.primitives.ciphers.Cipher(
-			cryptography.hazmat.primitives.ciphers.algorithms.AES(self.__shared_key),
-			cryptography.hazmat.primitives.ciphers.modes.GCM(iv),
-			backend=cryptography.hazmat.backends.default_backend()
-		).encryptor()
-
-		ciphertext = iv + encryptor.update(plaintext) + encryptor.finalize() + encryptor.tag
-		return ciphertext
+		return iv + self._get_aead().encrypt(iv, plaintext, None)
 
 
 class ExternalLogin:
@@ -1,6 +1,11 @@
 import base64
 import binascii
+import copy
+import datetime
+import hashlib
+import hmac
 import logging
+import secrets
 import aiohttp.web
 import asab
 
@@ -11,6 +16,8 @@ from ..models import Session
 
 L = logging.getLogger(__name__)
 
+_BASIC_PREFIX = b"Basic "
+
 
 class M2MIntrospectHandler(object):
 
@@ -23,6 +30,25 @@ class M2MIntrospectHandler(object):
 
 		self.BasicRealm = "asab"  # TODO: Configurable
 
+		# Recently used M2M sessions by credentials ID, with the time until which they are valid in the cache
+		# Entries are only reused until the session is due to be touched again
+		self.SessionCache = {}
+		self.SessionCacheExpiration = datetime.timedelta(
+			seconds=asab.Config.getseconds("seacatauth:authentication", "m2m_session_cache_expiration"))
+		app.PubSub.subscribe("Session.updated!", self._on_session_changed)
+		app.PubSub.subscribe("Session.deleted!", self._on_session_changed)
+
+		# Recently verified Basic credentials, so that the password hash is not recomputed on every request
+		# Maps credentials ID to a keyed hash of the verified password and its expiration
+		# The hash key never leaves this process
+		self.VerifiedCredentials = {}
+		self.VerifiedCredentialsExpiration = datetime.timedelta(
+			seconds=asab.Config.getseconds("seacatauth:authentication", "m2m_password_cache_expiration"))
+		self._VerificationKey = secrets.token_bytes(32)
+		app.PubSub.subscribe("Application.tick/60!", self._clear_expired_verified_credentials)
+		app.PubSub.subscribe("Credentials.updated!", self._on_credentials_changed)
+		app.PubSub.subscribe("Credentials.deleted!", self._on_credentials_changed)
+
 		web_app = app.WebContainer.WebApp
 		web_app.router.add_post("/nginx/introspect/m2m", self.nginx)
 
@@ -32,22 +58,30 @@ class M2MIntrospectHandler(object):
 		authorization_bytes = await request.read()
 
 		# Get Basic auth credentials
-		if not authorization_bytes.startswith(b'Basic '):
+		if not authorization_bytes.startswith(_BASIC_PREFIX):
 			L.log(asab.LOG_NOTICE, "Basic auth token not provided in request")
 			return None
 
+		# Both standard and URL-safe base64 alphabets are accepted
 		try:
-			username_password = base64.urlsafe_b64decode(authorization_bytes[len(b'Basic '):]).decode("ascii")
+			username_password = base64.urlsafe_b64decode(authorization_bytes[len(_BASIC_PREFIX):])
 		except binascii.Error:
 			L.log(asab.LOG_NOTICE, "Basic auth token must be base64-encoded")
 			return None
 
-		try:
-			username, password = username_password.split(":", 1)
-		except ValueError:
+		# Split before decoding; ':' cannot be a part of any other UTF-8 sequence
+		username, sep, password = username_password.partition(b":")
+		if not sep:
 			L.log(asab.LOG_NOTICE, "Basic auth token must match the 'username:password' format")
 			return None
 
+		try:
+			username = username.decode("utf-8")
+			password = password.decode("utf-8")
+		except UnicodeDecodeError:
+			L.log(asab.LOG_NOTICE, "Basic auth token must be UTF-8 encoded")
+			return None
+
 		# Locate credentials
 		credentials_id = await self.CredentialsService.locate(username, stop_at_first=True)
 		if credentials_id is None:
@@ -64,26 +98,22 @@ class M2MIntrospectHandler(object):
 			return None
 
 		# Authenticate request
-		authenticated = await provider.authenticate(
-			credentials_id,
-			{"password": password}
-		)
+		authenticated = await self._verify_password(provider, credentials_id, password)
 		if not authenticated:
 			L.log(asab.LOG_NOTICE, "Basic authentication failed", struct_data={"cid": credentials_id})
 			return None
 
 		# Find session object
-		try:
-			session = await self.SessionService.get_by(Session.FN.Credentials.Id, credentials_id)
-		except KeyError:
-			session = None
+		session = self._get_cached_session(credentials_id)
+		if session is None:
+			try:
+				session = await self.SessionService.get_by(Session.FN.Credentials.Id, credentials_id)
+			except KeyError:
+				session = None
 
 		if session is None:
 			# No session for given credentials exists; create a new one
-			access_ips = [request.remote]
-			ff = request.headers.get("X-Forwarded-For")
-			if ff is not None:
-				access_ips.extend(ff.split(", "))
+			access_ips = generic.get_request_access_ips(request)
 			login_descriptor = {
 				"id": "!m2m",
 				"factors": [{"type": "!m2m-basic-auth"}]
@@ -97,7 +127,7 @@ class M2MIntrospectHandler(object):
 			AuditLogger.log(asab.LOG_NOTICE, "Authentication successful", struct_data={
 				"cid": credentials_id,
 				"sid": str(session.Session.Id),
-				"fi": generic.get_request_access_ips(request),
+				"fi": access_ips,
 				"m2m": True,
 			})
 
@@ -109,9 +139,75 @@ class M2MIntrospectHandler(object):
 			})
 			return None
 
+		self._cache_session(credentials_id, session)
 		return session
 
 
+	async def _verify_password(self, provider, credentials_id, password):
+		if self.VerifiedCredentialsExpiration.total_seconds() <= 0:
+			return await provider.authenticate(credentials_id, {"password": password})
+
+		verification_id = hmac.new(
+			self._VerificationKey,
+			"{}\0{}".format(credentials_id, password).encode("utf-8"),
+			hashlib.sha256
+		).digest()
+		now = datetime.datetime.now(datetime.timezone.utc)
+		verified = self.VerifiedCredentials.get(credentials_id)
+		if verified is not None:
+			verified_id, expires_at = verified
+			if now < expires_at and hmac.compare_digest(verified_id, verification_id):
+				return True
+
+		authenticated = await provider.authenticate(credentials_id, {"password": password})
+		if authenticated:
+			self.VerifiedCredentials[credentials_id] = (verification_id, now + self.VerifiedCredentialsExpiration)
+		return authenticated
+
+
+	def _clear_expired_verified_credentials(self, event_name):
+		now = datetime.datetime.now(datetime.timezone.utc)
+		self.VerifiedCredentials = {
+			credentials_id: (verification_id, expires_at)
+			for credentials_id, (verification_id, expires_at) in self.VerifiedCredentials.items()
+			if now < expires_at
+		}
+
+
+	def _on_credentials_changed(self, event_name, credentials_id):
+		# Suspension, password change or deletion must take effect immediately
+		self.VerifiedCredentials.pop(credentials_id, None)
+
+
+	def _get_cached_session(self, credentials_id):
+		entry = self.SessionCache.get(credentials_id)
+		if entry is None:
+			return None
+		session, cached_until = entry
+		now = datetime.datetime.now(datetime.timezone.utc)
+		if now >= cached_until or now >= session.Session.ModifiedAt + self.SessionService.TouchCooldown:
+			# Stale or due to be touched: Reload from the database
+			del self.SessionCache[credentials_id]
+			return None
+		# Concurrent requests must not share (and modify) the same session object
+		return copy.deepcopy(session)
+
+
+	def _cache_session(self, credentials_id, session):
+		if self.SessionCacheExpiration.total_seconds() <= 0:
+			return
+		now = datetime.datetime.now(datetime.timezone.utc)
+		cached_until = min(now + self.SessionCacheExpiration, session.Session.Expiration)
+		self.SessionCache[credentials_id] = (copy.deepcopy(session), cached_until)
+
+
+	def _on_session_changed(self, event_name, session_id):
+		session_id = str(session_id)
+		for credentials_id, (session, _) in list(self.SessionCache.items()):
+			if str(session.Session.Id) == session_id:
+				del self.SessionCache[credentials_id]
+
+
 	async def nginx(self, request):
 		"""
 		M2M (machine-to-machine) introspection
@@ -151,7 +247,7 @@ class M2MIntrospectHandler(object):
 			try:
 				response = await nginx_introspection(request, session, self.App)
 			except Exception as e:
-				L.exception("Introspection failed: {}".format(e))
+				L.exception("Introspection failed", struct_data={"error": str(e)})
 				response = aiohttp.web.HTTPUnauthorized()
 		else:
 			response = aiohttp.web.HTTPUnauthorized()
@@ -1,7 +1,10 @@
+import asyncio
+import copy
 import datetime
 import json
 import logging
 import re
+import typing
 import urllib.parse
 import asab
 
@@ -24,6 +27,9 @@ from ..events import EventTypes
 
 L = logging.getLogger(__name__)
 
+_UTC = datetime.timezone.utc
+_now = datetime.datetime.now
+
 
 LOGIN_DESCRIPTOR_FALLBACK = [
 	{
@@ -109,6 +115,9 @@ class AuthenticationService(asab.Service):
 			init_values={"successful": 0, "failed": 0}
 		)
 
+		# In-flight login session reads, shared by concurrent requests for the same login session
+		self._PendingLoginSessionReads: typing.Dict[str, asyncio.Future] = {}
+
 		app.PubSub.subscribe("Application.housekeeping!", self._on_housekeeping)
 
 
@@ -160,17 +169,35 @@ class AuthenticationService(asab.Service):
 		for k, v in login_session.serialize().items():
 			upsertor.set(k, v, encrypt=k in LoginSession.EncryptedFields)
 		await upsertor.execute()
+		self._forget_login_session_read(login_session.Id)
 
 
 	async def get_login_session(self, login_session_id):
-		ls_data = await self.StorageService.get(
-			self.LoginSessionCollection, login_session_id, decrypt=LoginSession.EncryptedFields)
-		login_session = LoginSession.deserialize(self, ls_data)
-		if login_session.Created + self.LoginSessionExpiration < datetime.datetime.now(datetime.timezone.utc):
+		# Concurrent reads of the same login session share a single database round trip
+		read = self._PendingLoginSessionReads.get(login_session_id)
+		if read is None:
+			read = asyncio.ensure_future(self.StorageService.get(
+				self.LoginSessionCollection, login_session_id, decrypt=LoginSession.EncryptedFields))
+			self._PendingLoginSessionReads[login_session_id] = read
+			read.add_done_callback(lambda r: self._forget_login_session_read(login_session_id, r))
+		ls_data = await asyncio.shield(read)
+
+		# Every caller gets its own copy since deserialization and login flow modify the data
+		login_session = LoginSession.deserialize(self, copy.deepcopy(ls_data))
+		if login_session.Created + self.LoginSessionExpiration < _now(_UTC):
 			raise KeyError("Login session expired")
 		return login_session
 
 
+	def _forget_login_session_read(self, login_session_id, read=None):
+		"""
+		Stop sharing the pending read of the login session.
+		Called after writes, so that later readers do not join a read that may return the previous version.
+		"""
+		if read is None or self._PendingLoginSessionReads.get(login_session_id) is read:
+			self._PendingLoginSessionReads.pop(login_session_id, None)
+
+
 	async def update_login_session(self, login_session, *, data=None, login_attempts_left=None):
 		upsertor = self.StorageService.upsertor(
 			self.LoginSessionCollection,
@@ -183,14 +210,43 @@ class AuthenticationService(asab.Service):
 			upsertor.set("la", login_attempts_left)
 
 		await upsertor.execute(event_type=EventTypes.LOGIN_SESSION_UPDATED)
+		self._forget_login_session_read(login_session.Id)
+		L.info("Login session updated", struct_data={
+			"lsid": login_session.Id,
+		})
+
+		# Apply the changes to the in-memory object instead of reading the login session back
+		# Upsertor increments the object version by one
+		login_session.Version += 1
+		if data is not None:
+			login_session.SeacatLogin.Data = data
+		if login_attempts_left is not None:
+			login_session.SeacatLogin.LoginAttemptsLeft = login_attempts_left
+		return login_session
+
+
+	async def update_login_session_data(self, login_session, key: str, value):
+		"""
+		Set a single item of login session custom data without rewriting the rest of it
+		"""
+		upsertor = self.StorageService.upsertor(
+			self.LoginSessionCollection,
+			obj_id=login_session.Id,
+			version=login_session.Version
+		)
+		upsertor.set("d.{}".format(key), value)
+		await upsertor.execute(event_type=EventTypes.LOGIN_SESSION_UPDATED)
+		self._forget_login_session_read(login_session.Id)
+		login_session.Version += 1
+		login_session.SeacatLogin.Data[key] = value
 		L.info("Login session updated", struct_data={
 			"lsid": login_session.Id,
 		})
-		return await self.get_login_session(login_session.Id)
 
 
 	async def delete_login_session(self, login_session_id):
 		await self.StorageService.delete(self.LoginSessionCollection, login_session_id)
+		self._forget_login_session_read(login_session_id)
 		L.info("Login session deleted", struct_data={
 			"lsid": login_session_id
 		})
@@ -199,7 +255,7 @@ class AuthenticationService(asab.Service):
 	async def delete_expired_login_sessions(self):
 		collection = self.StorageService.Database[self.LoginSessionCollection]
 
-		query_filter = {"exp": {"$lt": datetime.datetime.now(datetime.timezone.utc)}}
+		query_filter = {"exp": {"$lt": _now(_UTC)}}
 		result = await collection.delete_many(query_filter)
 		if result.deleted_count > 0:
 			L.info("Expired login sessions deleted", struct_data={
@@ -317,8 +373,8 @@ class AuthenticationService(asab.Service):
 				login.AuthenticatedVia = descriptor.serialize()
 				L.log(
 					asab.LOG_NOTICE,
-					"User authenticated by descriptor '{}'".format(descriptor.ID),
-					struct_data={"cid": login.CredentialsId}
+					"User authenticated by descriptor",
+					struct_data={"cid": login.CredentialsId, "ldid": descriptor.ID}
 				)
 				break
 		return authenticated
@@ -352,11 +408,12 @@ class AuthenticationService(asab.Service):
 			"sid": str(new_sso_session.Session.Id),
 			"from_ip": from_info,
 		})
-		await self.LastActivityService.update_last_activity(
-			EventCode.LOGIN_SUCCESS, login_session.SeacatLogin.CredentialsId, from_ip=from_info)
-
-		# Delete login session
-		await self.delete_login_session(login_session.Id)
+		# Record last activity and delete login session (independent of each other)
+		await asyncio.gather(
+			self.LastActivityService.update_last_activity(
+				EventCode.LOGIN_SUCCESS, login_session.SeacatLogin.CredentialsId, from_ip=from_info),
+			self.delete_login_session(login_session.Id),
+		)
 
 		return new_sso_session
 
@@ -499,7 +556,7 @@ class AuthenticationService(asab.Service):
 		client_public_key,
 		request_headers: dict | None = None,
 		login_dict: dict | None = None,
-		login_preferences: list | None = None,
+		login_preferences: typing.Sequence[str] | None = None,
 	) -> LoginSession:
 		"""
 		Set up login session with located credentials and prepare login options
@@ -510,7 +567,7 @@ class AuthenticationService(asab.Service):
 		# Locate credentials
 		credentials_id = await self.CredentialsService.locate(ident, stop_at_first=True, login_dict=login_dict)
 
-		if credentials_id is None or credentials_id == []:
+		if not credentials_id:
 			L.log(asab.LOG_NOTICE, "Cannot locate credentials", struct_data={"ident": ident})
 			raise exceptions.LoginPrologueDeniedError("Unmatched ident")
 		elif credentials_id.startswith("m2m:"):
@@ -519,17 +576,20 @@ class AuthenticationService(asab.Service):
 				"cid": credentials_id})
 			raise exceptions.LoginPrologueDeniedError("Cannot login with M2M credentials")
 
-		credentials = await self.CredentialsService.get(credentials_id)
+		# The suspension check does not need to finish before the login descriptors are prepared
+		credentials, login_descriptors = await asyncio.gather(
+			self.CredentialsService.get(credentials_id),
+			self.prepare_login_descriptors(
+				credentials_id=credentials_id,
+				request_headers=request_headers,
+				login_preferences=login_preferences
+			),
+		)
 		if credentials.get("suspended") is True:
 			# Deny login to suspended credentials
 			L.warning("Login denied to suspended credentials", struct_data={"cid": credentials_id})
 			raise exceptions.LoginPrologueDeniedError("Cannot login with suspended credentials")
 
-		login_descriptors = await self.prepare_login_descriptors(
-			credentials_id=credentials_id,
-			request_headers=request_headers,
-			login_preferences=login_preferences
-		)
 		if login_descriptors is None:
 			L.log(asab.LOG_NOTICE, "No suitable login descriptor", struct_data={
 				"cid": credentials_id, "ldid": login_preferences})
@@ -521,7 +521,7 @@ class WebAuthnService(asab.Service):
 				require_user_verification=False,
 			)
 		except Exception as e:
-			L.warning("WebAuthn login failed with {}: {}".format(type(e).__name__, str(e)))
+			L.warning("WebAuthn login failed", struct_data={"error": type(e).__name__, "message": str(e)})
 			return False
 
 		# Update sign count in storage
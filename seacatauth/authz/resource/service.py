@@ -92,7 +92,7 @@ class ResourceService(asab.Service):
 	def __init__(self, app, service_name="seacatauth.ResourceService"):
 		super().__init__(app, service_name)
 		self.StorageService = app.get_service("asab.StorageService")
-		self.ResourceIdRegex = re.compile("^{}$".format(self.ResourceNamePattern))
+		self.ResourceIdRegex = re.compile(self.ResourceNamePattern)
 
 
 	async def initialize(self, app):
@@ -109,13 +109,20 @@ class ResourceService(asab.Service):
 		Check if all builtin resources exist. Create them if they don't.
 		Update their descriptions if they are outdated.
 		"""
+		# Fetch all existing builtin resources at once; only missing or outdated ones are written
+		collection = self.StorageService.Database[self.ResourceCollection]
+		db_resources = {}
+		async for resource_dict in collection.find(
+			{"_id": {"$in": list(self._BuiltinResources)}},
+			projection={"managed_by": 1, "description": 1, "_v": 1}
+		):
+			db_resources[resource_dict["_id"]] = resource_dict
+
 		for resource_id, resource_config in self._BuiltinResources.items():
 			description = resource_config.get("description")
 
-			L.debug("Checking for built-in resource {!r}".format(resource_id))
-			try:
-				db_resource = await self.get(resource_id)
-			except KeyError:
+			db_resource = db_resources.get(resource_id)
+			if db_resource is None:
 				await self.create(resource_id, description, is_managed_by_seacat_auth=True)
 				continue
 
@@ -131,17 +138,35 @@ class ResourceService(asab.Service):
 
 		if query_filter is None:
 			query_filter = {}
-		cursor = collection.find(query_filter)
 
-		cursor.sort("_id", 1)
-		if limit is not None:
-			cursor.skip(limit * page)
-			cursor.limit(limit)
+		if not limit:
+			# Unpaginated listing (no limit or limit 0): a $facet result is a single document,
+			# which could exceed the BSON size limit, and $limit must be positive
+			cursor = collection.find(query_filter)
+			cursor.sort("_id", 1)
+			count = await collection.count_documents(query_filter)
+			resources = [self.normalize_resource(resource_dict) async for resource_dict in cursor]
+			return {
+				"data": resources,
+				"count": count,
+			}
+
+		# Fetch the requested page and the total count in one round trip
+		pipeline = [
+			{"$match": query_filter},
+			{"$sort": {"_id": 1}},
+			{"$facet": {
+				"data": [{"$skip": limit * page}, {"$limit": limit}],
+				"count": [{"$count": "n"}],
+			}},
+		]
 
 		resources = []
-		count = await collection.count_documents(query_filter)
-		async for resource_dict in cursor:
-			resources.append(self.normalize_resource(resource_dict))
+		count = 0
+		async for result in collection.aggregate(pipeline):
+			resources = [self.normalize_resource(resource_dict) for resource_dict in result["data"]]
+			if len(result["count"]) > 0:
+				count = result["count"][0]["n"]
 
 		return {
 			"data": resources,
@@ -158,7 +183,8 @@ class ResourceService(asab.Service):
 
 
 	async def create(self, resource_id: str, description: str = None, is_managed_by_seacat_auth=False):
-		if self.ResourceIdRegex.match(resource_id) is None:
+		# Unlike match() with "$", fullmatch() does not accept a trailing newline
+		if self.ResourceIdRegex.fullmatch(resource_id) is None:
 			raise asab.exceptions.ValidationError(
 				"Resource ID must consist only of characters 'a-z0-9.:_-', "
 				"start with a letter, end with a letter or digit, "
@@ -214,13 +240,11 @@ class ResourceService(asab.Service):
 
 		# Remove the resource from all roles
 		role_svc = self.App.get_service("seacatauth.RoleService")
-		roles = await role_svc.list(resource_filter=resource_id)
-		if roles["count"] > 0:
-			for role in roles["data"]:
-				await role_svc.update(role["_id"], resources_to_remove=[resource_id])
+		n_roles = await role_svc.replace_resource_in_all_roles(resource_id)
+		if n_roles > 0:
 			L.log(asab.LOG_NOTICE, "Resource unassigned", struct_data={
 				"resource": resource_id,
-				"n_roles": roles["count"],
+				"n_roles": n_roles,
 			})
 
 		if hard_delete:
@@ -268,24 +292,18 @@ class ResourceService(asab.Service):
 		assert_resource_is_editable(resource)
 
 		role_svc = self.App.get_service("seacatauth.RoleService")
-		roles = await role_svc.list(resource_filter=resource_id)
 
 		# Delete existing resource
 		await self.StorageService.delete(self.ResourceCollection, resource_id)
 
 		# Create a new resource and assign it to the original one's roles
 		await self.create(new_resource_id, resource.get("description"))
-		if roles["count"] > 0:
-			for role in roles["data"]:
-				await role_svc.update(
-					role["_id"],
-					resources_to_remove=[resource_id],
-					resources_to_add=[new_resource_id])
+		n_roles = await role_svc.replace_resource_in_all_roles(resource_id, new_resource_id)
 
 		L.log(asab.LOG_NOTICE, "Resource renamed", struct_data={
 			"old_resource": resource_id,
-			"new_resource": resource_id,
-			"n_roles": roles["count"],
+			"new_resource": new_resource_id,
+			"n_roles": n_roles,
 		})
 
 
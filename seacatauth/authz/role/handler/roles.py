@@ -56,10 +56,7 @@ class RolesHandler(object):
 		tenant_id = request.match_info["tenant"]
 		if tenant_id == "*" or request.can_access_all_tenants \
 			or await self.RoleService.TenantService.has_tenant_assigned(request.Session.Credentials.Id, tenant_id):
-			response = {
-				cid: await self.RoleService.get_roles_by_credentials(cid, [tenant_id])
-				for cid in json_data
-			}
+			response = await self.RoleService.get_roles_by_credentials_batch(json_data, [tenant_id])
 			return asab.web.rest.json_response(request, response)
 
 		L.log(asab.LOG_NOTICE, "Tenant access denied.", struct_data={
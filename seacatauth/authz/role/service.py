@@ -3,6 +3,7 @@ import re
 import typing
 import asab.storage.exceptions
 import asab.exceptions
+import pymongo
 
 from ...models.const import ResourceId
 from ...generic import SessionContext
@@ -83,6 +84,42 @@ class RoleService(asab.Service):
 
 
 	async def initialize(self, app):
+		# Initialize indexes
+		collection = await self.StorageService.collection(self.RoleCollection)
+
+		# Tenant + propagation flag + ID
+		# Optimizes listing roles in role views, which filter by tenant (and propagation) and sort by ID
+		try:
+			await collection.create_index(
+				[
+					("tenant", pymongo.ASCENDING),
+					("propagated", pymongo.ASCENDING),
+					("_id", pymongo.ASCENDING),
+				]
+			)
+		except Exception as e:
+			L.error("Failed to create compound index.", struct_data={
+				"collection": self.RoleCollection,
+				"index": "tenant, propagated, _id",
+				"error": str(e),
+			})
+
+		# Resources + tenant
+		# Optimizes searching roles by assigned resource
+		try:
+			await collection.create_index(
+				[
+					("resources", pymongo.ASCENDING),
+					("tenant", pymongo.ASCENDING),
+				]
+			)
+		except Exception as e:
+			L.error("Failed to create compound index.", struct_data={
+				"collection": self.RoleCollection,
+				"index": "resources, tenant",
+				"error": str(e),
+			})
+
 		await self._ensure_preset_roles()
 
 
@@ -152,7 +189,7 @@ class RoleService(asab.Service):
 
 
 	def _role_tenant_id(self, role_id: str):
-		tenant_id = role_id.split("/")[0]
+		tenant_id, _, _ = role_id.partition("/")
 		if tenant_id == "*":
 			return None
 		else:
@@ -168,7 +205,12 @@ class RoleService(asab.Service):
 		resource_filter: str = None,
 		exclude_global: bool = False,
 		exclude_propagated: bool = False,
+		projection: typing.Optional[dict] = None,
 	):
+		"""
+		List roles visible in the tenant.
+		Use `projection` to fetch only some role fields when the full role documents are not needed.
+		"""
 		if tenant_id in {"*", None}:
 			tenant_id = None
 		else:
@@ -192,6 +234,7 @@ class RoleService(asab.Service):
 				sort=("_id", 1),
 				name_filter=name_filter,
 				resource_filter=resource_filter,
+				projection=projection,
 			):
 				roles.append(role)
 
@@ -440,6 +483,49 @@ class RoleService(asab.Service):
 		self.App.PubSub.publish("Role.updated!", role_id=role_id, asynchronously=True)
 
 
+	async def replace_resource_in_all_roles(self, resource_id: str, new_resource_id: str = None) -> int:
+		"""
+		Remove resource from all roles that have it assigned, optionally assigning another resource instead.
+		Intended for resource deletion and renaming, does not check access to the roles' tenants.
+
+		Returns the number of updated roles.
+		"""
+		collection = self.StorageService.Database[self.RoleCollection]
+		roles = [
+			role
+			async for role in collection.find(
+				{"resources": resource_id},
+				projection={"_id": 1, "_v": 1, "resources": 1, "managed_by": 1})
+		]
+		if len(roles) == 0:
+			return 0
+
+		# Check all the roles before changing any of them
+		for role in roles:
+			if role.get("managed_by"):
+				role["read_only"] = True
+			assert_role_is_editable(role)
+
+		role_ids = []
+		for role in roles:
+			resources = [r for r in role["resources"] if r != resource_id]
+			if new_resource_id is not None and new_resource_id not in resources:
+				resources.append(new_resource_id)
+			upsertor = self.StorageService.upsertor(self.RoleCollection, role["_id"], version=role["_v"])
+			upsertor.set("resources", resources)
+			await upsertor.execute(event_type=EventTypes.ROLE_UPDATED)
+			role_ids.append(role["_id"])
+
+		for role_id in role_ids:
+			self.App.PubSub.publish("Role.updated!", role_id=role_id, asynchronously=True)
+		L.log(asab.LOG_NOTICE, "Roles updated", struct_data={
+			"resource_removed": resource_id,
+			"resource_added": new_resource_id,
+			"n_roles": len(role_ids),
+		})
+		return len(role_ids)
+
+
 	async def _validate_role_resources(self, role_id: str, propagated: bool, resources: typing.Iterable):
 		"""
 		Check if resources exist and can be assigned to role
@@ -480,6 +566,8 @@ class RoleService(asab.Service):
 		if limit is not None:
 			cursor.skip(limit * page)
 			cursor.limit(limit)
+			if limit > 0:
+				cursor.batch_size(limit)
 
 		result = []
 		async for assignment in cursor:
@@ -487,6 +575,24 @@ class RoleService(asab.Service):
 		return result
 
 
+	async def get_roles_by_credentials_batch(self, credentials_ids: list, tenants: list = None) -> dict:
+		"""
+		Returns a dict of roles assigned to each of the given credentials, fetched in a single query.
+		Includes roles that match the given `tenant` plus global roles.
+		"""
+		result = {credentials_id: [] for credentials_id in credentials_ids}
+		collection = await self.StorageService.collection(self.CredentialsRolesCollection)
+		query_filter = {
+			"c": {"$in": list(result)},
+			"t": {"$in": [None, *(tenants or [])]}
+		}
+		cursor = collection.find(query_filter, projection={"c": 1, "r": 1})
+		cursor.sort("r", 1)
+		async for assignment in cursor:
+			result[assignment["c"]].append(assignment["r"])
+		return result
+
+
 	async def set_roles(self, credentials_id: str, roles: list, tenant: str = "*", include_global: bool = False):
 		"""
 		Assign a list of roles to given credentials and unassign all their current roles that are not listed
@@ -558,6 +664,8 @@ class RoleService(asab.Service):
 		if limit is not None:
 			cursor.skip(limit * page)
 			cursor.limit(limit)
+			if limit > 0:
+				cursor.batch_size(limit)
 
 		assignments = []
 		async for assignment in cursor:
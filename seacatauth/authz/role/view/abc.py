@@ -21,6 +21,7 @@ class RoleView(abc.ABC):
 		limit: typing.Optional[int] = None,
 		name_filter: typing.Optional[str] = None,
 		resource_filter: typing.Optional[str] = None,
+		projection: typing.Optional[dict] = None,
 		**kwargs
 	) -> typing.AsyncGenerator:
 		raise NotImplementedError()
@@ -31,13 +32,16 @@ class RoleView(abc.ABC):
 		limit: typing.Optional[int] = None,
 		query: typing.Optional[dict] = None,
 		sort: typing.Tuple[str, int] = ("_id", 1),
+		projection: typing.Optional[dict] = None,
 	) -> typing.AsyncGenerator:
-		cursor = self.StorageService.Database[self.CollectionName].find(query)
+		cursor = self.StorageService.Database[self.CollectionName].find(query, projection=projection)
 		cursor.sort(*sort)
 		if offset:
 			cursor.skip(offset)
 		if limit:
 			cursor.limit(limit)
+			if limit > 0:
+				cursor.batch_size(limit)
 		async for role in cursor:
 			yield role
 
@@ -44,10 +44,11 @@ class GlobalRoleView(RoleView):
 		sort: typing.Tuple[str, int] = ("_id", 1),
 		name_filter: typing.Optional[str] = None,
 		resource_filter: typing.Optional[str] = None,
+		projection: typing.Optional[dict] = None,
 		**kwargs
 	) -> typing.AsyncGenerator:
 		query = self._build_query(name_filter=name_filter, resource_filter=resource_filter)
-		async for role in self._iterate(offset, limit, query, sort):
+		async for role in self._iterate(offset, limit, query, sort, projection):
 			yield self._normalize_role(role)
 
 
@@ -57,7 +58,7 @@ class GlobalRoleView(RoleView):
 
 
 	def _role_tenant_matches(self, role_id: str):
-		return role_id.split("/")[0] == "*"
+		return role_id.startswith("*/")
 
 
 	def _normalize_role(self, role: dict):
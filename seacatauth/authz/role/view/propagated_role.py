@@ -45,10 +45,11 @@ class PropagatedRoleView(RoleView):
 		sort: typing.Tuple[str, int] = ("_id", 1),
 		name_filter: typing.Optional[str] = None,
 		resource_filter: typing.Optional[str] = None,
+		projection: typing.Optional[dict] = None,
 		**kwargs
 	) -> typing.AsyncGenerator:
 		query = self._build_query(name_filter=name_filter, resource_filter=resource_filter)
-		async for role in self._iterate(offset, limit, query, sort):
+		async for role in self._iterate(offset, limit, query, sort, projection):
 			yield self._normalize_role(role)
 
 
@@ -59,7 +60,7 @@ class PropagatedRoleView(RoleView):
 
 
 	def _role_tenant_matches(self, role_id: str):
-		tenant_id, role_name = role_id.split("/")
+		tenant_id, _, role_name = role_id.partition("/")
 		assert role_name[0] == "~"
 		return tenant_id == self.TenantId
 
@@ -69,7 +70,7 @@ class PropagatedRoleView(RoleView):
 
 
 	def _propagated_role_id_to_global(self, role_id: str):
-		_, role_name = role_id.split("/")
+		_, _, role_name = role_id.partition("/")
 		assert role_name[0] == "~"
 		return "*/{}".format(role_name[1:])
 
@@ -85,6 +86,5 @@ class PropagatedRoleView(RoleView):
 
 
 def global_role_id_to_propagated(role_id: str, tenant_id: str):
-	tenant_part, role_name = role_id.split("/")
-	assert tenant_part == "*"
-	return "{}/~{}".format(tenant_id, role_name)
+	assert role_id.startswith("*/")
+	return "{}/~{}".format(tenant_id, role_id[2:])
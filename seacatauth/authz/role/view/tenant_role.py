@@ -12,6 +12,7 @@ class CustomTenantRoleView(RoleView):
 	def __init__(self, storage_service, collection_name, tenant_id):
 		super().__init__(storage_service, collection_name)
 		self.TenantId = tenant_id
+		self.RoleIdPrefix = "{}/".format(tenant_id)
 
 
 	def _build_query(
@@ -45,10 +46,11 @@ class CustomTenantRoleView(RoleView):
 		sort: typing.Tuple[str, int] = ("_id", 1),
 		name_filter: typing.Optional[str] = None,
 		resource_filter: typing.Optional[str] = None,
+		projection: typing.Optional[dict] = None,
 		**kwargs
 	) -> typing.AsyncGenerator:
 		query = self._build_query(name_filter=name_filter, resource_filter=resource_filter)
-		async for role in self._iterate(offset, limit, query, sort):
+		async for role in self._iterate(offset, limit, query, sort, projection):
 			yield self._normalize_role(role)
 
 
@@ -58,7 +60,7 @@ class CustomTenantRoleView(RoleView):
 
 
 	def _role_tenant_matches(self, role_id: str):
-		return role_id.split("/")[0] == self.TenantId
+		return role_id.startswith(self.RoleIdPrefix)
 
 
 	def _normalize_role(self, role: dict):
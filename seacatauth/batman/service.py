@@ -1,3 +1,4 @@
+import functools
 import logging
 import base64
 import cryptography.hazmat.primitives.hashes
@@ -8,6 +9,23 @@ import asab
 L = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=1024)
+def _derive_password(key: bytes, credentials_id: str) -> str:
+	digest = cryptography.hazmat.primitives.hashes.Hash(
+		cryptography.hazmat.primitives.hashes.SHA256(),
+		cryptography.hazmat.backends.default_backend()
+	)
+	digest.update(credentials_id.encode("utf-8"))
+	digest.update(key)
+	return base64.b85encode(digest.finalize()).decode("ascii")
+
+
+@functools.lru_cache(maxsize=1024)
+def _derive_basic_auth_token(key: bytes, credentials_id: str, username: str) -> bytes:
+	password = _derive_password(key, credentials_id)
+	return base64.b64encode("{}:{}".format(username, password).encode("ascii"))
+
+
 class BatmanService(asab.Service):
 	"""
 	Basic Auth Token MANager
@@ -24,17 +42,17 @@ class BatmanService(asab.Service):
 			# TODO: There should be no hardcoded encryption password
 			self.Key = b"12345678901234567890123456789012"
 
-		if "batman:elk" in asab.Config.sections():
+		if asab.Config.has_section("batman:elk"):
 			raise ValueError(
 				"Config section 'batman:elk' has been renamed to 'batman:elasticsearch'. Please update your config.")
 
-		if "batman:elasticsearch" in asab.Config.sections():
+		if asab.Config.has_section("batman:elasticsearch"):
 			from .elasticsearch import ElasticSearchIntegration
 			self.Integrations.append(
 				ElasticSearchIntegration(self)
 			)
 
-		if "batman:grafana" in asab.Config.sections():
+		if asab.Config.has_section("batman:grafana"):
 			from .grafana import GrafanaIntegration
 			self.Integrations.append(
 				GrafanaIntegration(self)
@@ -51,10 +69,12 @@ class BatmanService(asab.Service):
 		"""
 		Generate a basic auth password using credentials ID and configured batman key.
 		"""
-		digest = cryptography.hazmat.primitives.hashes.Hash(
-			cryptography.hazmat.primitives.hashes.SHA256(),
-			cryptography.hazmat.backends.default_backend()
-		)
-		digest.update(credentials_id.encode("utf-8"))
-		digest.update(self.Key)
-		return base64.b85encode(digest.finalize()).decode("ascii")
+		return _derive_password(self.Key, credentials_id)
+
+
+	def generate_basic_auth_token(self, credentials_id, username):
+		"""
+		Generate a base64-encoded "username:password" basic auth token.
+		The password depends only on the credentials ID and the batman key, so the token is cached.
+		"""
+		return _derive_basic_auth_token(self.Key, credentials_id, username)
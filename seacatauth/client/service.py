@@ -1,3 +1,4 @@
+import asyncio
 import base64
 import binascii
 import datetime
@@ -49,6 +50,12 @@ class ClientService(asab.Service):
 			self.Cache = {}
 			self.CacheExpiration = datetime.timedelta(seconds=self.CacheExpiration)
 
+		# In-flight database lookups, shared by concurrent requests for the same client
+		self._PendingLookups: typing.Dict[str, asyncio.Future] = {}
+
+		# Parsed login and authorize URIs of registered clients, by client ID and URI field
+		self._ParsedUris: typing.Dict[str, typing.Dict[str, tuple]] = {}
+
 		# DEV OPTIONS
 		# _allow_custom_client_ids
 		#   https://www.oauth.com/oauth2-servers/client-registration/client-id-secret/
@@ -119,6 +126,8 @@ class ClientService(asab.Service):
 		if limit is not None:
 			cursor.skip(limit * page)
 			cursor.limit(limit)
+			if limit > 0:
+				cursor.batch_size(limit)
 
 		async for client in cursor:
 			if "__client_secret" in client:
@@ -148,12 +157,27 @@ class ClientService(asab.Service):
 			return client
 
 		# Get from the database
+		# Concurrent lookups of the same client share a single database round trip
+		lookup = self._PendingLookups.get(client_id)
+		if lookup is None:
+			lookup = asyncio.ensure_future(self._get_from_storage(client_id))
+			self._PendingLookups[client_id] = lookup
+			lookup.add_done_callback(lambda f: self._on_lookup_done(client_id, f))
+		return await asyncio.shield(lookup)
+
+
+	async def _get_from_storage(self, client_id: str):
 		client = await self.StorageService.get(self.ClientCollection, client_id)
-		client = self._normalize_client(client)
+		return self._normalize_client(client)
 
-		self._store_in_cache(client_id, client)
 
-		return client
+	def _on_lookup_done(self, client_id: str, lookup: asyncio.Future):
+		if self._PendingLookups.get(client_id) is not lookup:
+			# The client has been changed since the lookup started, do not cache the result
+			return
+		del self._PendingLookups[client_id]
+		if not lookup.cancelled() and lookup.exception() is None:
+			self._store_in_cache(client_id, lookup.result())
 
 
 	async def register(
@@ -419,9 +443,8 @@ class ClientService(asab.Service):
 			auth_token_decoded = base64.urlsafe_b64decode(auth_token.encode("ascii")).decode("ascii")
 		except (binascii.Error, UnicodeDecodeError):
 			return None, None
-		try:
-			client_id, client_secret = auth_token_decoded.split(":")
-		except ValueError:
+		client_id, sep, client_secret = auth_token_decoded.partition(":")
+		if not sep:
 			return None, None
 		return client_id, client_secret
 
@@ -530,12 +553,36 @@ class ClientService(asab.Service):
 
 
 	def _delete_from_cache(self, client_id: str):
+		# Lookups started before a client change must neither be joined nor cached
+		self._PendingLookups.pop(client_id, None)
+		self._ParsedUris.pop(client_id, None)
 		if self.Cache is None:
 			return
 		if client_id in self.Cache:
 			del self.Cache[client_id]
 
 
+	def split_client_uri(self, client: dict, field: str):
+		"""
+		Split a URI registered in client metadata (e.g. "login_uri") with generic.split_url_query.
+		The result is kept until the client is updated or deleted.
+
+		@param client: Client metadata, as returned by get()
+		@param field: Name of the URI field
+		@return: Result of generic.split_url_query, or None if the client has no such URI
+		"""
+		uri = client.get(field)
+		if uri is None:
+			return None
+		client_uris = self._ParsedUris.setdefault(client["_id"], {})
+		cached = client_uris.get(field)
+		# The URI is compared too, the client may have been updated on another instance
+		if cached is None or cached[0] != uri:
+			cached = (uri, generic.split_url_query(uri))
+			client_uris[field] = cached
+		return cached[1]
+
+
 	def _clear_expired_cache(self, event_name):
 		if not self.Cache:
 			return
@@ -28,6 +28,10 @@ class CommunicationProviderABC(asab.Configurable, abc.ABC):
 		)
 
 
+	async def finalize(self):
+		pass
+
+
 	async def can_send_to_target(self, credentials: dict) -> bool:
 		return await self.is_enabled()
 
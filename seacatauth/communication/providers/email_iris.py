@@ -9,6 +9,9 @@ from .abc import CommunicationProviderABC
 L = logging.getLogger(__name__)
 
 
+# Compact dumper; handles datetime template parameters such as invitation expiration
+_JSON_DUMPER = asab.web.rest.json.JSONDumper(pretty=False)
+
 TEMPLATE_FILES = {
 	"invitation": "Invitation.md",
 	"password_reset": "Password Reset.md",
@@ -29,26 +32,34 @@ class AsabIrisEmailProvider(CommunicationProviderABC):
 		super().__init__(app, config_section_name, config=config)
 		self.AsabIrisUrl = self.Config.get("url").rstrip("/") + "/"
 		self.TemplateBasePath = self.Config.get("template_path")
+		self.TemplatePaths = {
+			template_id: "{}{}".format(self.TemplateBasePath, file_name)
+			for template_id, file_name in TEMPLATE_FILES.items()
+		}
+		# Shared HTTP session, keeps connections to ASAB Iris open between messages
+		self.Session = None
+
+
+	async def finalize(self):
+		if self.Session is not None:
+			await self.Session.close()
+			self.Session = None
 
 
 	async def can_send_to_target(self, credentials: dict) -> bool:
-		if not await self.is_enabled():
-			return False
-		try:
-			_get_email_address(credentials)
-			return True
-		except KeyError:
+		# Check the address first, it is cheaper than asking ASAB Iris
+		if not credentials.get("email"):
 			return False
+		return await self.is_enabled()
 
 
 	async def is_enabled(self) -> bool:
 		url = "{}{}".format(self.AsabIrisUrl, "features")
-		async with _asab_iris_session(self.App) as session:
-			async with session.get(url) as resp:
-				response = await resp.json()
-				if resp.status != 200:
-					L.error("Error response from ASAB Iris.", struct_data=response)
-					return False
+		async with self._get_session().get(url) as resp:
+			response = await resp.json()
+			if resp.status != 200:
+				L.error("Error response from ASAB Iris.", struct_data=response)
+				return False
 
 		enabled_orchestrators = response.get("orchestrators", [])
 		return "email" in enabled_orchestrators
@@ -70,21 +81,27 @@ class AsabIrisEmailProvider(CommunicationProviderABC):
 				"params": kwargs,
 			}
 		}
-		data = asab.web.rest.json.JSONDumper(pretty=False)(email_decl)
+		data = _JSON_DUMPER(email_decl).encode("utf-8")
 
 		url = "{}{}".format(self.AsabIrisUrl, "send_email")
-		async with _asab_iris_session(self.App) as session:
-			async with session.put(url, data=data, headers={"Content-Type": "application/json"}) as resp:
-				response = await resp.json()
-				if resp.status == 200:
-					L.log(asab.LOG_NOTICE, "Email sent.")
-				else:
-					L.error("Error response from ASAB Iris.", struct_data=response)
-					raise RuntimeError("Email delivery failed.")
+		async with self._get_session().put(url, data=data, headers={"Content-Type": "application/json"}) as resp:
+			response = await resp.json()
+			if resp.status == 200:
+				L.log(asab.LOG_NOTICE, "Email sent.")
+			else:
+				L.error("Error response from ASAB Iris.", struct_data=response)
+				raise RuntimeError("Email delivery failed.")
+
+
+	def _get_session(self):
+		# Created lazily, the session must be constructed inside the running event loop
+		if self.Session is None or self.Session.closed:
+			self.Session = _asab_iris_session(self.App)
+		return self.Session
 
 
 	def _get_template_path(self, template_id: str) -> str:
-		return "{}{}".format(self.TemplateBasePath, TEMPLATE_FILES[template_id])
+		return self.TemplatePaths[template_id]
 
 
 def _get_email_address(credentials: dict) -> str:
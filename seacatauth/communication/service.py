@@ -63,6 +63,11 @@ class CommunicationService(asab.Service):
 				L.error("Unsupported communication provider: '{}'".format(config_section_name))
 
 
+	async def finalize(self, app):
+		for provider in self.CommunicationProviders.values():
+			await provider.finalize()
+
+
 	def is_enabled(self):
 		return len(self.CommunicationProviders) > 0
 
@@ -231,10 +231,7 @@ class CookieHandler(object):
 		session = await self._authenticate_request(request, client_id)
 		if session is None:
 			# Create a new root session with anonymous_cid and a cookie
-			from_info = [request.remote]
-			forwarded_for = request.headers.get("X-Forwarded-For")
-			if forwarded_for is not None:
-				from_info.extend(forwarded_for.split(", "))
+			from_info = generic.get_request_access_ips(request)
 			track_id = uuid.uuid4().bytes
 			session = await self.CookieService.create_anonymous_cookie_client_session(
 				anonymous_cid, client, scope,
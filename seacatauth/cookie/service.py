@@ -1,6 +1,11 @@
+import asyncio
 import base64
+import binascii
+import copy
 import datetime
+import functools
 import hashlib
+import http.cookies
 import re
 import logging
 import typing
@@ -18,6 +23,56 @@ from .. import AuditLogger
 
 L = logging.getLogger(__name__)
 
+# Used only for quoting cookie values the same way aiohttp's set_cookie does
+_COOKIE_CODER = http.cookies.SimpleCookie()
+
+# Request key under which looked-up session cookie values are cached
+_COOKIE_VALUES_KEY = "seacatauth.session_cookie_values"
+
+# URL-safe to standard base64 alphabet, for decoding cookie values with binascii directly
+_URLSAFE_B64_TRANSLATION = bytes.maketrans(b"-_", b"+/")
+
+# Upper bound on the number of sessions held in the local session cache
+_SESSION_CACHE_MAX_SIZE = 10000
+
+
+@functools.lru_cache(maxsize=4096)
+def _derive_cookie_name(base_name: str, client_id: str) -> str:
+	client_id_hash = base64.b32encode(
+		hashlib.sha256(client_id.encode("ascii")).digest()[:10]
+	).decode("ascii")
+	return "{}_{}".format(base_name, client_id_hash)
+
+
+def _cookie_name_pattern(cookie_name: str) -> re.Pattern:
+	"""
+	Match the root cookie name and client cookie names (root name + "_" + base32 hash, see _derive_cookie_name)
+	"""
+	return re.compile(r"{}(_[A-Z2-7]+)?".format(re.escape(cookie_name)))
+
+
+def _decode_cookie_value(cookie_value: str) -> bytes:
+	"""
+	Same as base64.urlsafe_b64decode, without its generic argument handling, and tolerant of missing padding
+	"""
+	value = cookie_value.encode("ascii").translate(_URLSAFE_B64_TRANSLATION)
+	return binascii.a2b_base64(value + b"=" * (-len(value) % 4))
+
+
+def _put_set_cookie_header(response, cookie_name: str, header: str):
+	"""
+	Add a Set-Cookie header, replacing any header already pending for the same cookie name
+	(same as aiohttp's set_cookie and del_cookie do).
+	"""
+	prefix = cookie_name + "="
+	pending = response.headers.getall("Set-Cookie", ())
+	if any(h.startswith(prefix) for h in pending):
+		others = [h for h in pending if not h.startswith(prefix)]
+		del response.headers["Set-Cookie"]
+		for h in others:
+			response.headers.add("Set-Cookie", h)
+	response.headers.add("Set-Cookie", header)
+
 
 class CookieService(asab.Service):
 	"""
@@ -36,11 +91,7 @@ class CookieService(asab.Service):
 
 		# Configure root cookie
 		self.CookieName = asab.Config.get("seacatauth:cookie", "name")
-		self.CookiePattern = re.compile(
-			"(^{cookie}({client_suffix})?=[^;]*; ?"
-			"|; ?{cookie}({client_suffix})?=[^;]*"
-			"|^{cookie}({client_suffix})?=[^;]*)".format(cookie=self.CookieName, client_suffix=r"_[A-Z8-9]+")
-		)
+		self.CookieNamePattern = _cookie_name_pattern(self.CookieName)
 		self.CookieSecure = asab.Config.getboolean("seacatauth:cookie", "secure")
 		self.RootCookieDomain = asab.Config.get("seacatauth:cookie", "domain") or None
 		if self.RootCookieDomain is not None:
@@ -48,6 +99,19 @@ class CookieService(asab.Service):
 
 		self.AuthWebUiBaseUrl = app.AuthWebUiUrl.rstrip("/")
 
+		# Pre-rendered Set-Cookie attributes, keyed by (domain, secure)
+		self.SetCookieTemplates = {}
+
+		# Recently used cookie sessions by raw cookie value
+		# Entries are only reused until the session is due to be touched again
+		self.SessionCache = {}
+		self.SessionCacheKeys = {}
+		self.SessionCacheExpiration = datetime.timedelta(
+			seconds=asab.Config.getseconds("seacatauth:cookie", "session_cache_expiration"))
+		app.PubSub.subscribe("Session.updated!", self._on_session_changed)
+		app.PubSub.subscribe("Session.deleted!", self._on_session_changed)
+		app.PubSub.subscribe("Application.tick/60!", self._clear_expired_cached_sessions)
+
 
 	async def initialize(self, app):
 		self.AuthenticationService = app.get_service("seacatauth.AuthenticationService")
@@ -56,17 +120,20 @@ class CookieService(asab.Service):
 
 	def get_cookie_name(self, client_id: str = None):
 		if client_id is not None:
-			client_id_hash = base64.b32encode(
-				hashlib.sha256(client_id.encode("ascii")).digest()[:10]
-			).decode("ascii")
-			cookie_name = "{}_{}".format(self.CookieName, client_id_hash)
+			return _derive_cookie_name(self.CookieName, client_id)
 		else:
-			cookie_name = self.CookieName
-		return cookie_name
+			return self.CookieName
 
 
 	def remove_seacat_cookies_from_request(self, cookie_string):
-		return self.CookiePattern.sub("", cookie_string)
+		if self.CookieName not in cookie_string:
+			return cookie_string
+		# Only the cookie names are inspected, other cookies are passed on verbatim
+		return "; ".join(
+			cookie
+			for cookie in (c.strip() for c in cookie_string.split(";"))
+			if cookie and self.CookieNamePattern.fullmatch(cookie.partition("=")[0].rstrip()) is None
+		)
 
 
 	@staticmethod
@@ -82,7 +149,36 @@ class CookieService(asab.Service):
 		Get Seacat session cookie value from request header
 		"""
 		cookie_name = self.get_cookie_name(client_id)
-		cookie = request.cookies.get(cookie_name)
+
+		# The value is cached on the request, the cookie can be looked up by middleware and again by the handler
+		cached_values = request.get(_COOKIE_VALUES_KEY)
+		if cached_values is None:
+			cached_values = request[_COOKIE_VALUES_KEY] = {}
+		elif cookie_name in cached_values:
+			return cached_values[cookie_name]
+
+		cookie = cached_values[cookie_name] = self._parse_session_cookie_value(request, cookie_name)
+		return cookie
+
+
+	@staticmethod
+	def _parse_session_cookie_value(request, cookie_name):
+		cookie_string = request.headers.get("Cookie")
+		if not cookie_string or cookie_name not in cookie_string:
+			return None
+
+		# Look up the single cookie by plain string splitting instead of parsing all cookies with SimpleCookie
+		cookie = None
+		for pair in cookie_string.split(";"):
+			name, sep, value = pair.partition("=")
+			if not sep or name.strip() != cookie_name:
+				continue
+			value = value.strip()
+			if value.startswith("\""):
+				# Quoted values need unquoting; leave that to SimpleCookie
+				return request.cookies.get(cookie_name)
+			# Same as with SimpleCookie, the last occurrence wins
+			cookie = value
 		return cookie
 
 
@@ -94,7 +190,8 @@ class CookieService(asab.Service):
 		Root sessions have no client_id attribute, which MongoDB matches as None.
 		"""
 		session_cookie_id = self.get_session_cookie_value(request, client_id)
-		if session_cookie_id is None:
+		if not session_cookie_id:
+			# Missing or empty cookie cannot match any session, skip the database lookup
 			raise exceptions.NoCookieError(client_id)
 		return await self.get_session_by_session_cookie_value(session_cookie_id)
 
@@ -109,11 +206,15 @@ class CookieService(asab.Service):
 
 		# Then try looking for the session in the database
 		try:
-			cookie_value = base64.urlsafe_b64decode(cookie_value.encode("ascii"))
+			cookie_value = _decode_cookie_value(cookie_value)
 		except ValueError as e:
 			raise exceptions.SessionNotFoundError(
 				"Cookie value is not base64", query={"cookie_value": cookie_value}) from e
 
+		session = self._get_cached_session(cookie_value)
+		if session is not None:
+			return session
+
 		try:
 			session = await self.SessionService.get_by(Session.FN.Cookie.Id, cookie_value)
 		except KeyError as e:
@@ -123,9 +224,52 @@ class CookieService(asab.Service):
 			raise exceptions.SessionNotFoundError(
 				"Error deserializing session", query={"cookie_value": cookie_value}) from e
 
+		self._cache_session(cookie_value, session)
 		return session
 
 
+	def _get_cached_session(self, cookie_value: bytes):
+		entry = self.SessionCache.get(cookie_value)
+		if entry is None:
+			return None
+		session, cached_until = entry
+		now = datetime.datetime.now(datetime.timezone.utc)
+		if now >= cached_until or now >= session.Session.ModifiedAt + self.SessionService.TouchCooldown:
+			# Stale or due to be touched: Reload from the database
+			self._uncache_session(str(session.Session.Id))
+			return None
+		# Concurrent requests must not share (and modify) the same session object
+		return copy.deepcopy(session)
+
+
+	def _cache_session(self, cookie_value: bytes, session):
+		if self.SessionCacheExpiration.total_seconds() <= 0:
+			return
+		if len(self.SessionCache) >= _SESSION_CACHE_MAX_SIZE:
+			return
+		now = datetime.datetime.now(datetime.timezone.utc)
+		cached_until = min(now + self.SessionCacheExpiration, session.Session.Expiration)
+		self.SessionCache[cookie_value] = (copy.deepcopy(session), cached_until)
+		self.SessionCacheKeys[str(session.Session.Id)] = cookie_value
+
+
+	def _uncache_session(self, session_id: str):
+		cookie_value = self.SessionCacheKeys.pop(session_id, None)
+		if cookie_value is not None:
+			self.SessionCache.pop(cookie_value, None)
+
+
+	def _on_session_changed(self, event_name, session_id):
+		self._uncache_session(str(session_id))
+
+
+	def _clear_expired_cached_sessions(self, event_name):
+		now = datetime.datetime.now(datetime.timezone.utc)
+		for session, cached_until in list(self.SessionCache.values()):
+			if now >= cached_until:
+				self._uncache_session(str(session.Session.Id))
+
+
 	async def get_session_by_authorization_code(self, code):
 		return await self.OpenIdConnectService.get_session_by_authorization_code(code)
 
@@ -140,21 +284,17 @@ class CookieService(asab.Service):
 		"""
 		Create a new cookie-based session
 		"""
-		# Check if the Client exists
-		client_svc = self.App.get_service("seacatauth.ClientService")
-		try:
-			await client_svc.get(client_id)
-		except KeyError:
-			raise KeyError("Client '{}' not found".format(client_id))
-
-		# Build the session
-		session_builders = await self.SessionService.build_client_session(
-			root_session,
-			client_id=client_id,
-			scope=scope,
-			tenants=tenants,
-			nonce=nonce,
-			redirect_uri=redirect_uri,
+		# Check if the Client exists while building the session
+		_, session_builders = await asyncio.gather(
+			self._check_client_exists(client_id),
+			self.SessionService.build_client_session(
+				root_session,
+				client_id=client_id,
+				scope=scope,
+				tenants=tenants,
+				nonce=nonce,
+				redirect_uri=redirect_uri,
+			),
 		)
 		session_builders.append(cookie_session_builder())
 
@@ -168,6 +308,14 @@ class CookieService(asab.Service):
 		return session
 
 
+	async def _check_client_exists(self, client_id):
+		client_svc = self.App.get_service("seacatauth.ClientService")
+		try:
+			await client_svc.get(client_id)
+		except KeyError:
+			raise KeyError("Client '{}' not found".format(client_id))
+
+
 	async def create_anonymous_cookie_client_session(
 		self, anonymous_cid: str, client_dict: dict, scope: list,
 		track_id: bytes = None,
@@ -222,13 +370,13 @@ class CookieService(asab.Service):
 		if secure is None:
 			secure = self.CookieSecure
 
-		response.set_cookie(
-			cookie_name,
-			cookie_value,
-			httponly=True,  # Not accessible from Javascript
-			domain=cookie_domain,
-			secure=secure,
-		)
+		template = self.SetCookieTemplates.get((cookie_domain, secure))
+		if template is None:
+			template = self._build_set_cookie_template(cookie_domain, secure)
+			self.SetCookieTemplates[(cookie_domain, secure)] = template
+
+		_, coded_value = _COOKIE_CODER.value_encode(cookie_value)
+		_put_set_cookie_header(response, cookie_name, "{}={}{}".format(cookie_name, coded_value, template))
 
 
 	def delete_session_cookie(self, response, client_id: typing.Optional[str] = None):
@@ -236,4 +384,20 @@ class CookieService(asab.Service):
 		Add a Set-Cookie header to the response to unset Seacat Session cookie
 		"""
 		cookie_name = self.get_cookie_name(client_id)
-		response.del_cookie(cookie_name)
+		_put_set_cookie_header(
+			response, cookie_name,
+			"{}=\"\"; expires=Thu, 01 Jan 1970 00:00:00 GMT; Max-Age=0; Path=/".format(cookie_name))
+
+
+	@staticmethod
+	def _build_set_cookie_template(cookie_domain, secure):
+		"""
+		Render the cookie attributes that follow the name=value pair
+		"""
+		template = ""
+		if cookie_domain is not None:
+			template += "; Domain={}".format(cookie_domain)
+		template += "; HttpOnly; Path=/"
+		if secure:
+			template += "; Secure"
+		return template
@@ -67,7 +67,7 @@ class ChangePasswordHandler(object):
 		if not authenticated:
 			AuditLogger.log(asab.LOG_NOTICE, "Password change failed: Authentication failed", struct_data={
 				"cid": credentials_id, "from_ip": from_ip})
-			await self.LastActivityService.update_last_activity(
+			self.LastActivityService.update_last_activity_nowait(
 				EventCode.PASSWORD_CHANGE_FAILED, credentials_id=credentials_id, from_ip=from_ip)
 			return asab.web.rest.json_response(request, status=401, data={
 				"result": "UNAUTHORIZED",
@@ -79,7 +79,7 @@ class ChangePasswordHandler(object):
 		if new_password == old_password:
 			AuditLogger.log(asab.LOG_NOTICE, "Password change denied: Reusing old passwords is not allowed.", struct_data={
 				"cid": credentials_id, "from_ip": from_ip})
-			await self.LastActivityService.update_last_activity(
+			self.LastActivityService.update_last_activity_nowait(
 				EventCode.PASSWORD_CHANGE_FAILED, credentials_id=credentials_id, from_ip=from_ip)
 			return asab.web.rest.json_response(request, status=400, data={
 				"result": "FAILED",
@@ -92,7 +92,7 @@ class ChangePasswordHandler(object):
 		except exceptions.WeakPasswordError as e:
 			AuditLogger.log(asab.LOG_NOTICE, "Password change denied: New password too weak.", struct_data={
 				"cid": credentials_id, "from_ip": from_ip})
-			await self.LastActivityService.update_last_activity(
+			self.LastActivityService.update_last_activity_nowait(
 				EventCode.PASSWORD_CHANGE_FAILED, credentials_id=credentials_id, from_ip=from_ip)
 			return asab.web.rest.json_response(request, status=400, data={
 				"result": "FAILED",
@@ -102,7 +102,7 @@ class ChangePasswordHandler(object):
 			L.exception("Password change failed: {}".format(e))
 			AuditLogger.log(asab.LOG_NOTICE, "Password change failed: {}".format(e.__class__.__name__), struct_data={
 				"cid": credentials_id, "from_ip": from_ip})
-			await self.LastActivityService.update_last_activity(
+			self.LastActivityService.update_last_activity_nowait(
 				EventCode.PASSWORD_CHANGE_FAILED, credentials_id=credentials_id, from_ip=from_ip)
 			return asab.web.rest.json_response(request, status=401, data={"result": "FAILED"})
 
@@ -147,13 +147,13 @@ class ChangePasswordHandler(object):
 		except exceptions.CredentialsSuspendedError:
 			AuditLogger.log(asab.LOG_NOTICE, "Password reset denied: Credentials suspended", struct_data={
 				"cid": credentials_id})
-			await self.LastActivityService.update_last_activity(
+			self.LastActivityService.update_last_activity_nowait(
 				EventCode.PASSWORD_CHANGE_FAILED, credentials_id=credentials_id, from_ip=from_ip)
 			return asab.web.rest.json_response(request, status=401, data={"result": "FAILED"})
 		except exceptions.WeakPasswordError as e:
 			AuditLogger.log(asab.LOG_NOTICE, "Password reset denied: New password too weak.", struct_data={
 				"cid": credentials_id, "from_ip": from_ip})
-			await self.LastActivityService.update_last_activity(
+			self.LastActivityService.update_last_activity_nowait(
 				EventCode.PASSWORD_CHANGE_FAILED, credentials_id=credentials_id, from_ip=from_ip)
 			return asab.web.rest.json_response(request, status=400, data={
 				"result": "FAILED",
@@ -163,7 +163,7 @@ class ChangePasswordHandler(object):
 			L.exception("Password reset failed: {}".format(e))
 			AuditLogger.log(asab.LOG_NOTICE, "Password reset failed: {}".format(e.__class__.__name__), struct_data={
 				"cid": credentials_id, "from_ip": from_ip})
-			await self.LastActivityService.update_last_activity(
+			self.LastActivityService.update_last_activity_nowait(
 				EventCode.PASSWORD_CHANGE_FAILED, credentials_id=credentials_id, from_ip=from_ip)
 			return asab.web.rest.json_response(request, status=401, data={"result": "FAILED"})
 
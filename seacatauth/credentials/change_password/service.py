@@ -159,6 +159,7 @@ class ChangePasswordService(asab.Service):
 			"password": new_password,
 			"enforce_factors": list(enforce_factors)
 		})
+		self.App.PubSub.publish("Credentials.updated!", credentials_id=credentials_id)
 
 
 	async def _token_id_from_token_string(self, password_reset_token):
@@ -284,6 +284,8 @@ class MongoDBCredentialsProvider(EditableCredentialsProviderABC):
 		)
 		if limit >= 0:
 			cursor.limit(limit)
+			if limit > 0:
+				cursor.batch_size(limit)
 
 		cursor.sort("username", 1)
 
@@ -60,10 +60,7 @@ class RegistrationHandler(object):
 		"""
 		# TODO: Limit the number of requests
 		# Get IPs of the invitation issuer
-		access_ips = [request.remote]
-		forwarded_for = request.headers.get("X-Forwarded-For")
-		if forwarded_for is not None:
-			access_ips.extend(forwarded_for.split(", "))
+		access_ips = generic.get_request_access_ips(request)
 
 		expiration = json_data.get("expiration")
 		if isinstance(expiration, str):
@@ -88,10 +85,7 @@ class RegistrationHandler(object):
 		Generate a registration code and send a registration link to the user's email.
 		"""
 		# Get IPs of the invitation issuer
-		access_ips = [request.remote]
-		forwarded_for = request.headers.get("X-Forwarded-For")
-		if forwarded_for is not None:
-			access_ips.extend(forwarded_for.split(", "))
+		access_ips = generic.get_request_access_ips(request)
 
 		expiration = json_data.get("expiration")
 		if isinstance(expiration, str):
@@ -271,10 +265,7 @@ class RegistrationHandler(object):
 			return aiohttp.web.HTTPNotFound()
 
 		# Log IPs from which the request was made
-		access_ips = [request.remote]
-		forwarded_for = request.headers.get("X-Forwarded-For")
-		if forwarded_for is not None:
-			access_ips.extend(forwarded_for.split(", "))
+		access_ips = generic.get_request_access_ips(request)
 
 		# TODO: Limit the number of self-registrations with the same IP / same email address
 		# TODO: Limit the total number of active registrations
@@ -76,6 +76,8 @@ class AppleIDOAuth2Login(GenericOAuth2Login):
 				raise ExternalOAuthFlowError("Unknown error during authorization flow.")
 
 		id_token = authorize_data.get("id_token")
+		if id_token is not None:
+			await self._prepare_jwks_for_token(id_token)
 		verified_claims = self._get_verified_claims(id_token, expected_nonce)
 
 		user_info = {
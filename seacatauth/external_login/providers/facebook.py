@@ -1,7 +1,6 @@
 import logging
 import typing
 import urllib.parse
-import aiohttp
 
 from .generic import GenericOAuth2Login
 from ..exceptions import ExternalOAuthFlowError
@@ -85,17 +84,16 @@ class FacebookOAuth2Login(GenericOAuth2Login):
 		access_token = token_data["access_token"]
 
 		qparams = {"fields": self.Fields, "access_token": access_token}
-		async with aiohttp.ClientSession() as session:
-			async with session.get(self.UserInfoEndpoint, params=qparams) as resp:
-				data = await resp.json()
-				if resp.status != 200:
-					L.error("Error response from external auth provider.", struct_data={
-						"provider": self.Type,
-						"status": resp.status,
-						"data": data,
-						"url": resp.url
-					})
-					raise ExternalOAuthFlowError("Token request failed.")
+		async with self._get_session().get(self.UserInfoEndpoint, params=qparams) as resp:
+			data = await resp.json()
+			if resp.status != 200:
+				L.error("Error response from external auth provider.", struct_data={
+					"provider": self.Type,
+					"status": resp.status,
+					"data": data,
+					"url": resp.url
+				})
+				raise ExternalOAuthFlowError("Token request failed.")
 
 		user_info = {}
 		if "id" in data:
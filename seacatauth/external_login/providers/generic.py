@@ -1,5 +1,7 @@
+import asyncio
 import json
 import re
+import time
 import typing
 import urllib.parse
 import logging
@@ -10,12 +12,18 @@ import aiohttp.web
 import jwcrypto.jwt
 import jwcrypto.jwk
 import jwcrypto.jws
+import jwcrypto.common
 
 from ..exceptions import ExternalOAuthFlowError
 
 
 L = logging.getLogger(__name__)
 
+_CONFIG_SECTION_PATTERN = re.compile(r"seacatauth:oauth2:([_a-zA-Z0-9]+)")
+
+# Unknown key IDs do not trigger a JWKS refetch more often than this (seconds)
+_JWKS_MIN_REFRESH_INTERVAL = 60
+
 
 class GenericOAuth2Login(asab.Configurable):
 	"""
@@ -47,11 +55,22 @@ class GenericOAuth2Login(asab.Configurable):
 
 	Type = None
 
+	# ID token claims that are passed on as user info
+	AllowedClaims = frozenset({
+		"iss", "sub", "email", "phone_number", "preferred_username", "name", "email_verified",
+		"phone_number_verified", "nonce"
+	})
+
+	ConfigDefaults = {
+		# How long the provider's public keys are trusted before they are fetched again
+		"jwks_cache_expiration": "1h",
+	}
+
 	def __init__(self, external_login_svc, config_section_name, config=None):
 		# TODO: Get the URLs automatically from the discovery_uri (or issuer name)
 		super().__init__(config_section_name, config)
 		if self.Type is None:
-			match = re.match("seacatauth:oauth2:([_a-zA-Z0-9]+)", config_section_name)
+			match = _CONFIG_SECTION_PATTERN.match(config_section_name)
 			self.Type = match.group(1)
 
 		# Adopt proper OAuth/OpenID terminology
@@ -99,6 +118,13 @@ class GenericOAuth2Login(asab.Configurable):
 		assert self.Label is not None
 
 		self.JwkSet = None
+		self.JwksCacheExpiration = self.Config.getseconds("jwks_cache_expiration")
+		self.JwksFetchedAt = 0
+		# Single-flight: concurrent logins wait for one JWKS fetch instead of each fetching the set
+		self.JwksLock = asyncio.Lock()
+
+		# Shared HTTP session, keeps connections to the identity provider open between requests
+		self.Session = None
 
 		# The URL to return to after successful external login
 		# Mostly for debugging purposes
@@ -107,11 +133,36 @@ class GenericOAuth2Login(asab.Configurable):
 		else:
 			self.CallbackUrl = external_login_svc.CallbackUrlTemplate.format(provider_type=self.Type)
 
+		# Query parameters that do not change between requests
+		self.AuthorizeParams = (
+			("response_type", "code"),
+			("client_id", self.ClientId),
+			("scope", self.Scope),
+		)
+		self.TokenParams = (
+			("grant_type", "authorization_code"),
+			("client_id", self.ClientId),
+		)
+		self.TokenSecretParams = (("client_secret", self.ClientSecret),) if self.ClientSecret else ()
+
 
 	async def initialize(self, app):
 		await self._prepare_jwks()
 
 
+	async def finalize(self):
+		if self.Session is not None:
+			await self.Session.close()
+			self.Session = None
+
+
+	def _get_session(self) -> aiohttp.ClientSession:
+		# Created lazily, the session must be constructed inside the running event loop
+		if self.Session is None or self.Session.closed:
+			self.Session = aiohttp.ClientSession()
+		return self.Session
+
+
 	def acr_value(self) -> str:
 		"""
 		Authentication Context Class Reference (ACR)
@@ -123,25 +174,57 @@ class GenericOAuth2Login(asab.Configurable):
 		return "ext:{}".format(self.Type)
 
 
+	def _jwks_is_fresh(self) -> bool:
+		return self.JwkSet is not None and time.time() - self.JwksFetchedAt < self.JwksCacheExpiration
+
+
 	async def _prepare_jwks(self, speculative=True):
 		if not self.JwksUri:
 			return
-		if self.JwkSet and speculative:
+		if speculative and self._jwks_is_fresh():
+			return
+		requested_at = time.time()
+		async with self.JwksLock:
+			# Re-check, the set may have been fetched while waiting for the lock
+			if speculative and self._jwks_is_fresh():
+				return
+			if self.JwksFetchedAt >= requested_at:
+				return
+			await self._fetch_jwks()
+
+
+	async def _prepare_jwks_for_token(self, id_token: str):
+		"""
+		Make sure the JWK set is loaded, fresh and contains the key that signed the token.
+		An unknown key ID usually means that the provider has rotated its keys.
+		"""
+		await self._prepare_jwks()
+		if self.JwkSet is None:
+			return
+		kid = _get_token_kid(id_token)
+		if kid is None or self.JwkSet.get_key(kid) is not None:
 			return
-		async with aiohttp.ClientSession() as session:
-			async with session.get(self.JwksUri) as resp:
-				if resp.status != 200:
-					text = await resp.text()
-					L.error(
-						"Failed to fetch server JWK set: External identity provider responded with error.",
-						struct_data={
-							"provider": self.Type,
-							"status": resp.status,
-							"url": resp.url,
-							"text": text})
-					return
-				jwks = await resp.text()
+		if time.time() - self.JwksFetchedAt > _JWKS_MIN_REFRESH_INTERVAL:
+			L.info("ID token signed with unknown key, refreshing JWK set.", struct_data={
+				"provider": self.Type, "kid": kid})
+			await self._prepare_jwks(speculative=False)
+
+
+	async def _fetch_jwks(self):
+		async with self._get_session().get(self.JwksUri) as resp:
+			if resp.status != 200:
+				text = await resp.text()
+				L.error(
+					"Failed to fetch server JWK set: External identity provider responded with error.",
+					struct_data={
+						"provider": self.Type,
+						"status": resp.status,
+						"url": resp.url,
+						"text": text})
+				return
+			jwks = await resp.text()
 		self.JwkSet = jwcrypto.jwk.JWKSet.from_json(jwks)
+		self.JwksFetchedAt = time.time()
 		L.info("Identity provider public JWK set loaded.", struct_data={"type": self.Type})
 
 	def get_authorize_uri(
@@ -149,17 +232,14 @@ class GenericOAuth2Login(asab.Configurable):
 		state: typing.Optional[str] = None,
 		nonce: typing.Optional[str] = None
 	):
-		query_params = [
-			("response_type", "code"),
-			("client_id", self.ClientId),
-			("scope", self.Scope),
+		query_params = self.AuthorizeParams + (
 			("redirect_uri", redirect_uri or self.CallbackUrl),
 			("prompt", "select_account"),
-		]
+		)
 		if state is not None:
-			query_params.append(("state", state))
+			query_params += (("state", state),)
 		if nonce is not None:
-			query_params.append(("nonce", nonce))
+			query_params += (("nonce", nonce),)
 		return "{authorize_uri}?{query_string}".format(
 			authorize_uri=self.AuthorizationEndpoint,
 			query_string=urllib.parse.urlencode(query_params)
@@ -170,30 +250,26 @@ class GenericOAuth2Login(asab.Configurable):
 		"""
 		Send auth code to token request endpoint and return access token
 		"""
-		request_params = [
-			("grant_type", "authorization_code"),
+		request_params = self.TokenParams + (
 			("code", code),
-			("client_id", self.ClientId),
-			("redirect_uri", redirect_uri or self.CallbackUrl)]
-		if self.ClientSecret:
-			request_params.append(("client_secret", self.ClientSecret))
+			("redirect_uri", redirect_uri or self.CallbackUrl),
+		) + self.TokenSecretParams
 		query_string = urllib.parse.urlencode(request_params)
 
 		headers = {
 			"content-type": "application/x-www-form-urlencoded"
 		}
-		async with aiohttp.ClientSession() as session:
-			async with session.post(self.TokenEndpoint, data=query_string, headers=headers) as resp:
-				if resp.status != 200:
-					text = await resp.text()
-					L.error("Error response from external auth provider.", struct_data={
-						"status": resp.status,
-						"url": resp.url,
-						"text": text
-					})
-					raise ExternalOAuthFlowError("Token request failed.")
-				else:
-					yield resp
+		async with self._get_session().post(self.TokenEndpoint, data=query_string, headers=headers) as resp:
+			if resp.status != 200:
+				text = await resp.text()
+				L.error("Error response from external auth provider.", struct_data={
+					"status": resp.status,
+					"url": resp.url,
+					"text": text
+				})
+				raise ExternalOAuthFlowError("Token request failed.")
+			else:
+				yield resp
 
 	async def get_user_info(self, authorize_data: dict, expected_nonce: str | None = None) -> typing.Optional[dict]:
 		"""
@@ -225,7 +301,7 @@ class GenericOAuth2Login(asab.Configurable):
 			raise ExternalOAuthFlowError("No 'id_token' in token response.")
 
 		id_token = token_data["id_token"]
-		await self._prepare_jwks()
+		await self._prepare_jwks_for_token(id_token)
 
 		id_token_claims = self._get_verified_claims(id_token, expected_nonce)
 		user_info = self._user_data_from_id_token_claims(id_token_claims)
@@ -233,33 +309,40 @@ class GenericOAuth2Login(asab.Configurable):
 		return user_info
 
 	def _user_data_from_id_token_claims(self, id_token_claims: dict):
-		user_info = {
-			k: v
-			for k, v in id_token_claims.items()
-			if k in {
-				"iss", "sub", "email", "phone_number", "preferred_username", "name", "email_verified",
-				"phone_number_verified", "nonce"
-			} and v is not None
-		}
+		# Iterate the allowed claims, the token may carry many more
+		user_info = {}
+		for k in self.AllowedClaims:
+			v = id_token_claims.get(k)
+			if v is not None:
+				user_info[k] = v
 		return user_info
 
 	def _get_verified_claims(self, id_token, expected_nonce: str | None = None):
+		if id_token is None:
+			L.error("No ID token to verify.", struct_data={"provider": self.Type})
+			raise ExternalOAuthFlowError("No ID token.")
+		if self.JwkSet is None:
+			L.error("Cannot verify ID token: Identity provider public JWK set not loaded.", struct_data={
+				"provider": self.Type})
+			raise ExternalOAuthFlowError("Identity provider public keys not available.")
+
 		check_claims = self._get_claims_to_verify()
 		if expected_nonce:
 			check_claims["nonce"] = expected_nonce
 		try:
 			id_token = jwcrypto.jwt.JWT(jwt=id_token, key=self.JwkSet, check_claims=check_claims)
 			claims = json.loads(id_token.claims)
-		except jwcrypto.jws.InvalidJWSSignature:
+		except jwcrypto.jws.InvalidJWSSignature as e:
 			L.error("Invalid ID token signature.", struct_data={"provider": self.Type})
-			raise ExternalOAuthFlowError("Invalid ID token signature.")
-		except jwcrypto.jwt.JWTExpired:
+			raise ExternalOAuthFlowError("Invalid ID token signature.") from e
+		except jwcrypto.jwt.JWTExpired as e:
 			L.error("Expired ID token.", struct_data={"provider": self.Type})
-			raise ExternalOAuthFlowError("Expired ID token.")
-		except Exception as e:
+			raise ExternalOAuthFlowError("Expired ID token.") from e
+		except (jwcrypto.common.JWException, ValueError, TypeError, KeyError) as e:
+			# Any other JOSE error (malformed token, unknown key, invalid claim) or malformed token content
 			L.error("Error reading ID token claims.", struct_data={
-				"provider": self.Type, "error": str(e)})
-			raise ExternalOAuthFlowError("Error reading ID token claims.")
+				"provider": self.Type, "error": "{}: {}".format(e.__class__.__name__, e)})
+			raise ExternalOAuthFlowError("Error reading ID token claims.") from e
 		return claims
 
 
@@ -268,3 +351,17 @@ class GenericOAuth2Login(asab.Configurable):
 			"iss": self.Issuer,
 			"aud": self.ClientId
 		}
+
+
+def _get_token_kid(token: str) -> typing.Optional[str]:
+	"""
+	Read the key ID from the JOSE header without verifying the token
+	"""
+	try:
+		header = jwcrypto.common.json_decode(
+			jwcrypto.common.base64url_decode(token.partition(".")[0]))
+	except Exception:
+		return None
+	if not isinstance(header, dict):
+		return None
+	return header.get("kid")
@@ -1,7 +1,6 @@
 import logging
 import typing
 import urllib.parse
-import aiohttp
 
 from .generic import GenericOAuth2Login
 from ..exceptions import ExternalOAuthFlowError
@@ -63,15 +62,14 @@ class GitHubOAuth2Login(GenericOAuth2Login):
 		access_token = access_token[0]
 		authorization = "bearer {}".format(access_token)
 
-		async with aiohttp.ClientSession() as session:
-			async with session.get(self.UserInfoEndpoint, headers={"Authorization": authorization}) as resp:
-				user_data = await resp.json()
-				if resp.status != 200:
-					L.error("Error response from external auth provider.", struct_data={
-						"provider": self.Type,
-						"status": resp.status,
-						"data": user_data})
-					raise ExternalOAuthFlowError("User info request failed.")
+		async with self._get_session().get(self.UserInfoEndpoint, headers={"Authorization": authorization}) as resp:
+			user_data = await resp.json()
+			if resp.status != 200:
+				L.error("Error response from external auth provider.", struct_data={
+					"provider": self.Type,
+					"status": resp.status,
+					"data": user_data})
+				raise ExternalOAuthFlowError("User info request failed.")
 
 		email = user_data.get("email")
 		if not email:
@@ -93,14 +91,13 @@ class GitHubOAuth2Login(GenericOAuth2Login):
 		"""
 		Get Github user's primary email address.
 		"""
-		async with aiohttp.ClientSession() as session:
-			async with session.get(self.UserEmailsURI, headers={"Authorization": authorization}) as resp:
-				emails = await resp.json()
-				if resp.status != 200:
-					L.error("Error response from external auth provider", struct_data={
-						"status": resp.status,
-						"data": emails})
-					return None
+		async with self._get_session().get(self.UserEmailsURI, headers={"Authorization": authorization}) as resp:
+			emails = await resp.json()
+			if resp.status != 200:
+				L.error("Error response from external auth provider", struct_data={
+					"status": resp.status,
+					"data": emails})
+				return None
 
 		for email_data in emails:
 			if email_data.get("primary"):
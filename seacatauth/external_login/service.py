@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import secrets
 import aiohttp
@@ -65,12 +66,29 @@ class ExternalLoginService(asab.Service):
 		self.LastActivityService = app.get_service("seacatauth.LastActivityService")
 		self.CookieService = app.get_service("seacatauth.CookieService")
 
-		for provider in self.Providers.values():
-			await provider.initialize(app)
+		# Providers fetch their public keys over the network, initialize them concurrently
+		providers = list(self.Providers.values())
+		results = await asyncio.gather(
+			*(provider.initialize(app) for provider in providers),
+			return_exceptions=True
+		)
+		for provider, result in zip(providers, results):
+			if isinstance(result, Exception):
+				# The public keys are fetched again on the next login with the provider
+				L.error("Failed to initialize external login provider.", struct_data={
+					"provider": provider.Type, "error": str(result)})
+			elif isinstance(result, BaseException):
+				# Cancellation and interpreter exit must not be swallowed
+				raise result
 
 		await self.ExternalLoginAccountStorage.initialize()
 
 
+	async def finalize(self, app):
+		for provider in self.Providers.values():
+			await provider.finalize()
+
+
 	def _prepare_providers(self):
 		providers = {}
 		for section in asab.Config.sections():
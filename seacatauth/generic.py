@@ -14,6 +14,9 @@ import argon2
 L = logging.getLogger(__name__)
 SessionContext = contextvars.ContextVar("request_session", default=None)
 
+# Separator of X-Forwarded-For list items, with or without surrounding whitespace
+_FORWARDED_FOR_SEPARATOR = re.compile(r"\s*,\s*")
+
 
 class SearchParams:
 	"""
@@ -290,23 +293,37 @@ def urlunparse(
 	return urllib.parse.urlunparse((scheme, netloc, path, params, query, fragment))
 
 
+def split_url_query(url: str) -> typing.Tuple[urllib.parse.SplitResult, typing.Tuple[typing.Tuple[str, str], ...]]:
+	"""
+	Split the URL into components and parse its query into (key, value) pairs.
+	"""
+	parsed = urllib.parse.urlsplit(url)
+	return parsed, tuple(urllib.parse.parse_qsl(parsed.query))
+
+
 def update_url_query_params(url: str, **params):
-	parsed = urlparse(url)
+	return update_split_url_query_params(split_url_query(url), **params)
+
+
+def update_split_url_query_params(split_url: tuple, **params):
+	"""
+	Same as update_url_query_params, for a URL already split by split_url_query
+	"""
+	parsed, query_pairs = split_url
 	query = {}
-	for k, v in urllib.parse.parse_qsl(parsed["query"]):
+	for k, v in query_pairs:
 		if k in query:
 			raise ValueError("Repeated query parameters ({!r}) are not supported.".format(k))
 		query[k] = v
 	query.update(params)
-	parsed["query"] = urllib.parse.urlencode(query)
-	return urlunparse(**parsed)
+	return urllib.parse.urlunsplit(parsed._replace(query=urllib.parse.urlencode(query)))
 
 
 def get_request_access_ips(request) -> list:
 	access_ips = [request.remote]
 	ff = request.headers.get("X-Forwarded-For")
-	if ff is not None:
-		access_ips.extend(ff.split(", "))
+	if ff:
+		access_ips.extend(_FORWARDED_FOR_SEPARATOR.split(ff.strip()))
 	return access_ips
 
 
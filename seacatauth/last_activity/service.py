@@ -1,5 +1,7 @@
+import asyncio
 import datetime
 import logging
+import pymongo
 import asab.storage.exceptions
 
 from .codes import EventCode
@@ -21,10 +23,30 @@ class LastActivityService(asab.Service):
 
 	LastActivityCollection = "lce"
 
+	# Number of buffered credentials that triggers an immediate flush
+	FlushBatchSize = 100
+
 	def __init__(self, app, service_name="seacatauth.LastActivityService"):
 		super().__init__(app, service_name)
 		self.StorageService = app.get_service("asab.StorageService")
 
+		# Buffered last activity updates, coalesced per credentials ID: {cid: {event_name: event_data}}
+		self.PendingUpdates = {}
+		# Strong references to running flush tasks, the event loop keeps only weak ones
+		self.FlushTasks = set()
+
+		app.PubSub.subscribe("Application.tick!", self._on_tick_flush)
+
+
+	async def finalize(self, app):
+		if len(self.FlushTasks) > 0:
+			await asyncio.gather(*self.FlushTasks, return_exceptions=True)
+		await self.flush()
+
+
+	async def _on_tick_flush(self, event_name):
+		await self.flush()
+
 
 	async def update_last_activity(self, event_code: EventCode, credentials_id: str, **kwargs):
 		assert isinstance(credentials_id, str)
@@ -35,6 +57,44 @@ class LastActivityService(asab.Service):
 		await coll.update_one({"_id": credentials_id}, {"$set": {event_code.name: kwargs}}, upsert=True)
 
 
+	def update_last_activity_nowait(self, event_code: EventCode, credentials_id: str, **kwargs):
+		"""
+		Buffer the last activity update and write it in bulk on the next flush.
+		Repeated events of the same type for the same credentials are coalesced, only the latest one is written.
+		"""
+		assert isinstance(credentials_id, str)
+		kwargs["_c"] = datetime.datetime.now(datetime.timezone.utc)
+		self.PendingUpdates.setdefault(credentials_id, {})[event_code.name] = kwargs
+		if len(self.PendingUpdates) >= self.FlushBatchSize:
+			task = asyncio.create_task(self.flush())
+			self.FlushTasks.add(task)
+			task.add_done_callback(self.FlushTasks.discard)
+
+
+	async def flush(self):
+		"""
+		Write all buffered last activity updates in a single bulk operation.
+		"""
+		if len(self.PendingUpdates) == 0:
+			return
+		pending, self.PendingUpdates = self.PendingUpdates, {}
+		coll = await self.StorageService.collection(self.LastActivityCollection)
+		try:
+			await coll.bulk_write([
+				pymongo.UpdateOne({"_id": credentials_id}, {"$set": events}, upsert=True)
+				for credentials_id, events in pending.items()
+			], ordered=False)
+		except Exception as e:
+			L.error("Failed to write last activity updates, will retry on next flush.", struct_data={
+				"count": len(pending), "error": str(e)})
+			# Put the batch back, the updates buffered meanwhile are newer and take precedence
+			for credentials_id, events in pending.items():
+				newer_events = self.PendingUpdates.get(credentials_id)
+				if newer_events is not None:
+					events.update(newer_events)
+				self.PendingUpdates[credentials_id] = events
+
+
 	async def get_last_logins(self, credentials_id: str) -> dict:
 		try:
 			last_events = await self.StorageService.get(self.LastActivityCollection, credentials_id)
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import urllib
 import urllib.parse
@@ -16,6 +17,9 @@ from ...last_activity import EventCode
 
 L = logging.getLogger(__name__)
 
+# Supported values of the "prompt" authorize parameter
+_SUPPORTED_PROMPTS = frozenset(["none", "login", "select_account"])
+
 
 class OAuthAuthorizeError(Exception):
 	def __init__(
@@ -80,6 +84,7 @@ class AuthorizeHandler(object):
 
 		self.LoginPath = "#/login"
 		self.HomePath = "#/"
+		self.DefaultLoginUri = generic.split_url_query("{}{}".format(self.AuthWebuiBaseUrl, self.LoginPath))
 
 		web_app = app.WebContainer.WebApp
 		web_app.router.add_get(self.AuthorizePath, self.authorize_get)
@@ -367,6 +372,7 @@ class AuthorizeHandler(object):
 				return await self.reply_with_redirect_to_login(
 					scope=requested_scope,
 					client_id=client_id,
+					client_dict=client_dict,
 					redirect_uri=redirect_uri,
 					state=state,
 					nonce=nonce,
@@ -380,6 +386,7 @@ class AuthorizeHandler(object):
 				return await self.reply_with_redirect_to_login(
 					scope=requested_scope,
 					client_id=client_id,
+					client_dict=client_dict,
 					redirect_uri=redirect_uri,
 					state=state,
 					nonce=nonce,
@@ -395,6 +402,7 @@ class AuthorizeHandler(object):
 				return await self.reply_with_redirect_to_login(
 					scope=requested_scope,
 					client_id=client_id,
+					client_dict=client_dict,
 					redirect_uri=redirect_uri,
 					state=state,
 					nonce=nonce,
@@ -414,6 +422,7 @@ class AuthorizeHandler(object):
 			return await self.reply_with_redirect_to_login(
 				scope=requested_scope,
 				client_id=client_id,
+				client_dict=client_dict,
 				redirect_uri=redirect_uri,
 				state=state,
 				nonce=nonce,
@@ -428,9 +437,22 @@ class AuthorizeHandler(object):
 			# Authentication successful, we can open a new client session
 			assert root_session is not None
 
+			# Check required factors and authorize access to tenants requested in scope concurrently
+			# TODO: Move the factor check to AuthenticationService.login, add "restricted" flag to the root session
+			factors_to_setup, authorized_tenant = await asyncio.gather(
+				self._get_factors_to_setup(root_session),
+				self.OpenIdConnectService.get_accessible_tenant_from_scope(
+					requested_scope, root_session.Credentials.Id,
+					has_access_to_all_tenants=self.OpenIdConnectService.RBACService.can_access_all_tenants(
+						root_session.Authorization.Authz)
+				),
+				return_exceptions=True
+			)
+			if isinstance(factors_to_setup, BaseException):
+				raise factors_to_setup
+
 			# Redirect to factor management page if (re)setting of any factor is required
-			# TODO: Move this check to AuthenticationService.login, add "restricted" flag to the root session
-			factors_to_setup = await self._get_factors_to_setup(root_session)
+			# This takes precedence over tenant authorization errors
 			if len(factors_to_setup) > 0:
 				L.log(asab.LOG_NOTICE, "Auth factor setup required. Redirecting to setup.", struct_data={
 					"missing_factors": " ".join(factors_to_setup), "cid": root_session.Credentials.Id})
@@ -439,29 +461,25 @@ class AuthorizeHandler(object):
 					response_type="code",
 					scope=requested_scope,
 					client_id=client_id,
+					client_dict=client_dict,
 					redirect_uri=redirect_uri,
 					state=state,
 				)
 
-			# Authorize access to tenants requested in scope
-			try:
-				authorized_tenant = await self.OpenIdConnectService.get_accessible_tenant_from_scope(
-					requested_scope, root_session.Credentials.Id,
-					has_access_to_all_tenants=self.OpenIdConnectService.RBACService.can_access_all_tenants(
-						root_session.Authorization.Authz)
-				)
-			except exceptions.NoTenantsError:
+			if isinstance(authorized_tenant, exceptions.NoTenantsError):
 				raise OAuthAuthorizeError(
 					AuthErrorResponseCode.NoTenants, client_id,
 					redirect_uri=redirect_uri,
 					state=state,
-				)
-			except exceptions.AccessDeniedError:
+				) from authorized_tenant
+			elif isinstance(authorized_tenant, exceptions.AccessDeniedError):
 				raise OAuthAuthorizeError(
 					AuthErrorResponseCode.TenantAccessDenied, client_id,
 					redirect_uri=redirect_uri,
 					state=state,
-				)
+				) from authorized_tenant
+			elif isinstance(authorized_tenant, BaseException):
+				raise authorized_tenant
 
 			if auth_token_type == "openid":
 				new_session = await self.OpenIdConnectService.create_oidc_session(
@@ -559,7 +577,8 @@ class AuthorizeHandler(object):
 			"from_ip": from_info,
 			"scope": requested_scope,
 		})
-		await self.OpenIdConnectService.LastActivityService.update_last_activity(
+		# Buffered, the redirect response does not wait for the database write
+		self.OpenIdConnectService.LastActivityService.update_last_activity_nowait(
 			EventCode.AUTHORIZE_SUCCESS,
 			credentials_id=new_session.Credentials.Id,
 			tenants=[authorized_tenant] if authorized_tenant else None,
@@ -679,31 +698,25 @@ class AuthorizeHandler(object):
 		"""
 
 		# Prepare the redirect URL
-		url = urllib.parse.urlparse(redirect_uri)
-		url_qs = urllib.parse.parse_qs(url.query)
+		# TODO: There should be no fragment in redirect URI
+		url, url_query = generic.split_url_query(redirect_uri)
+		url_qs = [(k, v) for k, v in url_query if k != "code" and (state is None or k != "state")]
 
 		if state is not None:
 			# The OAuth 2.0 Authorization Framework, 4.1.2.  Authorization Response
 			# If the "state" parameter was present in the client authorization request,
 			# then use the exact value received from the client.
-			url_qs["state"] = state
+			url_qs.append(("state", state))
 
 		# Add the Authorization Code into the response
-		url_qs["code"] = await self.OpenIdConnectService.create_authorization_code(
+		url_qs.append(("code", await self.OpenIdConnectService.create_authorization_code(
 			session,
 			code_challenge=code_challenge,
 			code_challenge_method=code_challenge_method
-		)
+		)))
 
 		# Success
-		url = urllib.parse.urlunparse((
-			url.scheme,
-			url.netloc,
-			url.path,
-			url.params,
-			urllib.parse.urlencode(url_qs, doseq=True),
-			url.fragment  # TODO: There should be no fragment in redirect URI
-		))
+		url = urllib.parse.urlunsplit(url._replace(query=urllib.parse.urlencode(url_qs)))
 
 		return aiohttp.web.HTTPFound(
 			url,
@@ -723,14 +736,16 @@ class AuthorizeHandler(object):
 		response_type: str,
 		scope: list,
 		redirect_uri: str,
+		client_dict: dict = None,
 		**authorize_params
 	):
 		"""
 		Reply with 404 and provide a link to the login form with a loopback to OIDC/authorize.
 		Pass on the query parameters.
 		"""
-		# Get client collection
-		client_dict = await self.OpenIdConnectService.ClientService.get(client_id)
+		# Get client collection, unless the caller has already loaded it
+		if client_dict is None:
+			client_dict = await self.OpenIdConnectService.ClientService.get(client_id)
 
 		# Build redirect uri
 		callback_uri = self.OpenIdConnectService.build_authorize_uri(
@@ -765,19 +780,21 @@ class AuthorizeHandler(object):
 		response_type: str,
 		scope: list,
 		redirect_uri: str,
+		client_dict: dict = None,
 		**authorize_params
 	):
 		"""
 		Redirect to home screen and force factor (re)configuration
 		"""
 		# Prepare the redirect URL
-		sfa_url = urllib.parse.urlparse("{}{}".format(
+		sfa_url, _ = generic.split_url_query("{}{}".format(
 			self.AuthWebuiBaseUrl,
 			self.HomePath
 		))
 
 		# Gather params which will be passed to the oidc/authorize request called after the OTP setup
-		client_dict = await self.OpenIdConnectService.ClientService.get(client_id)
+		if client_dict is None:
+			client_dict = await self.OpenIdConnectService.ClientService.get(client_id)
 		callback_uri = self.OpenIdConnectService.build_authorize_uri(
 			client_dict=client_dict,
 			client_id=client_id,
@@ -797,14 +814,7 @@ class AuthorizeHandler(object):
 		# TODO: There should be no fragment in redirect URI. Move to regular query.
 		fragment = "{}?{}".format(sfa_url.fragment, urllib.parse.urlencode(auth_url_params, doseq=True))
 
-		sfa_url = urllib.parse.urlunparse((
-			sfa_url.scheme,
-			sfa_url.netloc,
-			sfa_url.path,
-			sfa_url.params,
-			None,
-			fragment
-		))
+		sfa_url = urllib.parse.urlunsplit(sfa_url._replace(query="", fragment=fragment))
 
 		response = aiohttp.web.HTTPFound(
 			sfa_url,
@@ -841,18 +851,14 @@ class AuthorizeHandler(object):
 
 		if redirect_uri is not None:
 			# Redirect to redirect_uri
-			parts = urllib.parse.urlparse(redirect_uri)
-			for k, v in urllib.parse.parse_qs(parts.query).items():
+			parts, query = generic.split_url_query(redirect_uri)
+			redirect_qs = {}
+			for k, v in query:
 				if k not in qs:
-					qs[k] = v.pop()
-			redirect = urllib.parse.urlunparse((
-				parts.scheme,
-				parts.netloc,
-				parts.path,
-				None,  # params
-				urllib.parse.urlencode(qs),
-				None,
-			))
+					# The last occurrence wins
+					redirect_qs[k] = v
+			qs.update(redirect_qs)
+			redirect = urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(qs), fragment=""))
 		else:
 			# No redirect_uri -> redirect to UI login page
 			# TODO: Use the /message page on frontend
@@ -881,22 +887,21 @@ class AuthorizeHandler(object):
 		Check if the client has a registered login URI. If not, use the default.
 		Extend the URI with query parameters.
 		"""
-		login_uri = client_dict.get("login_uri")
+		login_uri = self.OpenIdConnectService.ClientService.split_client_uri(client_dict, "login_uri")
 		if login_uri is None:
-			login_uri = "{}{}".format(self.AuthWebuiBaseUrl, self.LoginPath)
+			login_uri = self.DefaultLoginUri
 
-		if "#" in login_uri:
+		parsed, _ = login_uri
+		if parsed.fragment:
 			# If the Login URI contains fragment, add the login params into the fragment query
-			parsed = generic.urlparse(login_uri)
-			fragment_parsed = generic.urlparse(parsed["fragment"])
-			query = dict(urllib.parse.parse_qsl(fragment_parsed["query"]))
+			fragment_parsed, fragment_query = generic.split_url_query(parsed.fragment)
+			query = dict(fragment_query)
 			query.update(login_query_params)
-			fragment_parsed["query"] = urllib.parse.urlencode(query)
-			parsed["fragment"] = generic.urlunparse(**fragment_parsed)
-			return generic.urlunparse(**parsed)
+			fragment = urllib.parse.urlunsplit(fragment_parsed._replace(query=urllib.parse.urlencode(query)))
+			return urllib.parse.urlunsplit(parsed._replace(fragment=fragment))
 		else:
 			# If the Login URI contains no fragment, add the login params into the regular URL query
-			return generic.update_url_query_params(login_uri, **dict(login_query_params))
+			return generic.update_split_url_query_params(login_uri, **dict(login_query_params))
 
 
 	def _validate_request_parameters(self, request_parameters):
@@ -960,7 +965,7 @@ class AuthorizeHandler(object):
 		prompt = request_parameters.get("prompt") or None
 		if prompt is not None:
 			# TODO: Prompt can be a list of multiple values (e.g. "prompt=select_account,consent")
-			if prompt not in frozenset(["none", "login", "select_account"]):
+			if prompt not in _SUPPORTED_PROMPTS:
 				L.error("Unsupported prompt.", struct_data={"prompt": prompt})
 				raise OAuthAuthorizeError(
 					AuthErrorResponseCode.InvalidRequest, client_id,
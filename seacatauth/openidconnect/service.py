@@ -14,7 +14,7 @@ import jwcrypto.jwk
 import jwcrypto.jws
 
 from ..models.const import ResourceId
-from ..generic import update_url_query_params
+from ..generic import split_url_query, update_split_url_query_params
 from ..models import Session
 from .. import exceptions
 from . import pkce
@@ -71,6 +71,8 @@ class OpenIdConnectService(asab.Service):
 		self.PKCE = pkce.PKCE()  # TODO: Restructure. This is OAuth, but not OpenID Connect!
 
 		self.PublicApiBaseUrl = app.PublicOpenIdConnectApiUrl
+		self.DefaultAuthorizeUri = split_url_query(
+			"{}{}".format(self.PublicApiBaseUrl, self.AuthorizePath.lstrip("/")))
 
 		self.BearerRealm = asab.Config.get("openidconnect", "bearer_realm")
 
@@ -404,10 +406,11 @@ class OpenIdConnectService(asab.Service):
 		Extend the URI with query parameters.
 		"""
 		# TODO: This should be removed. There must be only one authorize endpoint.
-		authorize_uri = client_dict.get("authorize_uri")
+		authorize_uri = self.ClientService.split_client_uri(client_dict, "authorize_uri")
 		if authorize_uri is None:
-			authorize_uri = "{}{}".format(self.PublicApiBaseUrl, self.AuthorizePath.lstrip("/"))
-		return update_url_query_params(authorize_uri, **{k: v for k, v in query_params.items() if v is not None})
+			authorize_uri = self.DefaultAuthorizeUri
+		return update_split_url_query_params(
+			authorize_uri, **{k: v for k, v in query_params.items() if v is not None})
 
 
 	async def revoke_token(self, token, token_type_hint=None):
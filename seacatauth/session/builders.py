@@ -8,6 +8,16 @@ from ..authz import build_credentials_authz
 
 L = logging.getLogger(__name__)
 
+# "profile", "email" and "phone" are scope values defined by OIDC
+# (https://openid.net/specs/openid-connect-core-1_0.html#ScopeClaims)
+# The values prefixed with "userinfo:" are kept for backwards compatibility
+# TODO: Remove the "userinfo:" scope values
+USERNAME_SCOPES = frozenset({"profile", "userinfo:username", "userinfo:*"})
+EMAIL_SCOPES = frozenset({"email", "userinfo:email", "userinfo:*"})
+PHONE_SCOPES = frozenset({"phone", "userinfo:phone", "userinfo:*"})
+CUSTOM_DATA_SCOPES = frozenset({"profile", "userinfo:data", "userinfo:*"})
+AUTHN_SCOPES = frozenset({"profile", "userinfo:authn", "userinfo:*"})
+
 
 async def credentials_session_builder(credentials_service, credentials_id, scope=None):
 	scope = scope or frozenset()
@@ -17,19 +27,15 @@ async def credentials_session_builder(credentials_service, credentials_id, scope
 		(Session.FN.Credentials.CreatedAt, credentials.get("_c")),
 		(Session.FN.Credentials.ModifiedAt, credentials.get("_m")),
 	]
-	# "profile", "email" and "phone" are scope values defined by OIDC
-	# (https://openid.net/specs/openid-connect-core-1_0.html#ScopeClaims)
-	# The values prefixed with "userinfo:" are kept for backwards compatibility
-	# TODO: Remove the "userinfo:" scope values
-	if "profile" in scope or "userinfo:username" in scope or "userinfo:*" in scope:
+	if not USERNAME_SCOPES.isdisjoint(scope):
 		data.append((Session.FN.Credentials.Username, credentials.get("username")))
-	if "email" in scope or "userinfo:email" in scope or "userinfo:*" in scope:
+	if not EMAIL_SCOPES.isdisjoint(scope):
 		data.append((Session.FN.Credentials.Email, credentials.get("email")))
-	if "phone" in scope or "userinfo:phone" in scope or "userinfo:*" in scope:
+	if not PHONE_SCOPES.isdisjoint(scope):
 		data.append((Session.FN.Credentials.Phone, credentials.get("phone")))
-	if "profile" in scope or "userinfo:data" in scope or "userinfo:*" in scope:
+	if not CUSTOM_DATA_SCOPES.isdisjoint(scope):
 		data.append((Session.FN.Credentials.CustomData, credentials.get("data")))
-	if "profile" in scope or "userinfo:authn" in scope or "userinfo:*" in scope:
+	if not AUTHN_SCOPES.isdisjoint(scope):
 		data.append((Session.FN.Authentication.TOTPSet, credentials.get("__totp") not in (None, "")))
 	return data
 
@@ -1,4 +1,4 @@
-import base64
+import asyncio
 import datetime
 import logging
 import typing
@@ -27,7 +27,8 @@ from .builders import (
 	authentication_session_builder,
 	available_factors_session_builder,
 	external_login_session_builder,
-	cookie_session_builder
+	cookie_session_builder,
+	AUTHN_SCOPES,
 )
 
 
@@ -258,6 +259,7 @@ class SessionService(asab.Service):
 					upsertor.set(key, value, encrypt=(key in Session.EncryptedAttributes))
 
 		await upsertor.execute(event_type=EventTypes.SESSION_UPDATED)
+		self.App.PubSub.publish("Session.updated!", session_id=session_id)
 		return await self.get(session_id)
 
 
@@ -274,6 +276,7 @@ class SessionService(asab.Service):
 		)
 		upsertor.set(Session.FN.Session.Expiration, expires_at)
 		await upsertor.execute(event_type=EventTypes.SESSION_UPDATED)
+		self.App.PubSub.publish("Session.updated!", session_id=session_id)
 
 		L.log(asab.LOG_NOTICE, "Session expiration updated.", struct_data={
 			"sid": session_id,
@@ -359,6 +362,8 @@ class SessionService(asab.Service):
 		if limit is not None:
 			cursor.skip(limit * page)
 			cursor.limit(limit)
+			if limit > 0:
+				cursor.batch_size(limit)
 
 		async for session_dict in cursor:
 			yield session_dict
@@ -404,6 +409,8 @@ class SessionService(asab.Service):
 		if limit is not None:
 			cursor.skip(limit * page)
 			cursor.limit(limit)
+			if limit > 0:
+				cursor.batch_size(limit)
 
 		sessions = []
 		count = await collection.count_documents(query_filter)
@@ -490,6 +497,7 @@ class SessionService(asab.Service):
 			# It can be ignored.
 			L.info("Conflict: Session already touched", struct_data={"sid": session.Session.Id, "v": version})
 
+		self.App.PubSub.publish("Session.updated!", session_id=session.SessionId)
 		return await self.get(session.SessionId)
 
 
@@ -532,7 +540,7 @@ class SessionService(asab.Service):
 		# Delete all the session's tokens
 		await self.TokenService.delete_tokens_by_session_id(session_id)
 
-		# TODO: Publish pubsub message for session deletion
+		self.App.PubSub.publish("Session.deleted!", session_id=session_id)
 
 
 	async def delete_all_sessions(self):
@@ -549,8 +557,8 @@ class SessionService(asab.Service):
 		# Delete iteratively so that every session is terminated properly
 		for session_dict in to_delete:
 			try:
-				# TODO: Publish pubsub message for session deletion
 				await self.StorageService.delete(self.SessionCollection, session_dict["_id"])
+				self.App.PubSub.publish("Session.deleted!", session_id=session_dict["_id"])
 				deleted += 1
 			except Exception as e:
 				L.error("Cannot delete session", struct_data={
@@ -746,9 +754,10 @@ class SessionService(asab.Service):
 		else:
 			exclude_resources = set()
 
-		session_builders = [
-			await credentials_session_builder(credentials_service, root_session.Credentials.Id, scope),
-			await authz_session_builder(
+		# The builders query independent services, run them concurrently
+		builder_coros = [
+			credentials_session_builder(credentials_service, root_session.Credentials.Id, scope),
+			authz_session_builder(
 				tenant_service=tenant_service,
 				role_service=role_service,
 				credentials_id=root_session.Credentials.Id,
@@ -756,21 +765,21 @@ class SessionService(asab.Service):
 				exclude_resources=exclude_resources,
 			)
 		]
+		include_profile = not AUTHN_SCOPES.isdisjoint(scope)
+		if include_profile:
+			builder_coros.append(external_login_session_builder(external_login_service, root_session.Credentials.Id))
+			builder_coros.append(available_factors_session_builder(authentication_service, root_session.Credentials.Id))
+		session_builders = list(await asyncio.gather(*builder_coros))
 
-		if "profile" in scope or "userinfo:authn" in scope or "userinfo:*" in scope:
-			session_builders.append(
-				await external_login_session_builder(external_login_service, root_session.Credentials.Id))
-			session_builders.append(
-				await available_factors_session_builder(authentication_service, root_session.Credentials.Id))
+		if include_profile:
 			session_builders.append([
 				(Session.FN.Authentication.LoginDescriptor, root_session.Authentication.LoginDescriptor),
 				(Session.FN.Authentication.LoginFactors, root_session.Authentication.LoginFactors),
 			])
 
 		if "batman" in scope:
-			password = batman_service.generate_password(root_session.Credentials.Id)
-			username = root_session.Credentials.Username
-			basic_auth = base64.b64encode("{}:{}".format(username, password).encode("ascii"))
+			basic_auth = batman_service.generate_basic_auth_token(
+				root_session.Credentials.Id, root_session.Credentials.Username)
 			session_builders.append([
 				(Session.FN.Batman.Token, basic_auth),
 			])
@@ -43,6 +43,8 @@ class MongoDBTenantProvider(EditableTenantProviderABC):
 			if limit is not None:
 				cursor.skip(limit * page)
 				cursor.limit(limit)
+				if limit > 0:
+					cursor.batch_size(limit)
 		else:
 			# Fetch tenants that contain `filter` substring
 			# Sort results so that tenants that start with the substring come first
@@ -169,6 +171,8 @@ class MongoDBTenantProvider(EditableTenantProviderABC):
 		if limit is not None:
 			cursor.skip(limit * page)
 			cursor.limit(limit)
+			if limit > 0:
+				cursor.batch_size(limit)
 
 		async for obj in cursor:
 			yield obj
@@ -214,6 +218,8 @@ class MongoDBTenantProvider(EditableTenantProviderABC):
 		if limit is not None:
 			cursor.skip(limit * page)
 			cursor.limit(limit)
+			if limit > 0:
+				cursor.batch_size(limit)
 
 		assignments = []
 		async for assignment in cursor:
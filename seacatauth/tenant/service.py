@@ -135,7 +135,8 @@ class TenantService(asab.Service):
 		tenant_roles = (await role_svc.list(
 			tenant_id=tenant_id,
 			exclude_global=True,
-			exclude_propagated=True
+			exclude_propagated=True,
+			projection={"_id": 1},
 		))["data"]
 		for role in tenant_roles:
 			role_id = role["_id"]
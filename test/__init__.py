@@ -1,2 +1,5 @@
 from .test_rbac import *
 from .test_oauth_url import *
+from .test_resource import *
+from .test_cookie import *
+from .test_login import *
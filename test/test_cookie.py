@@ -0,0 +1,60 @@
+import unittest
+
+from seacatauth.cookie.service import CookieService, _cookie_name_pattern, _derive_cookie_name
+
+
+class CookieNamePatternTestCase(unittest.TestCase):
+	maxDiff = None
+
+	def test_cookie_name_pattern(self):
+		pattern = _cookie_name_pattern("SeaCToken")
+		cases = [
+			("SeaCToken", True),
+			# Client cookie names, the base32 suffix contains digits 2-7
+			(_derive_cookie_name("SeaCToken", "my-client"), True),
+			(_derive_cookie_name("SeaCToken", "another-client"), True),
+			("SeaCToken_ABCDEFGHIJKLMNOPQRSTUVWXYZ234567", True),
+			("SeaCToken_ABC8", False),
+			("SeaCToken_ABC1", False),
+			("SeaCToken_abc", False),
+			("SeaCToken_", False),
+			("SeaCTokenX", False),
+			("mySeaCToken", False),
+			("other", False),
+		]
+		for cookie_name, expected in cases:
+			with self.subTest(cookie_name=cookie_name):
+				self.assertEqual(pattern.fullmatch(cookie_name) is not None, expected)
+
+	def test_cookie_name_pattern_escaped(self):
+		pattern = _cookie_name_pattern("Sea.Token")
+		self.assertIsNotNone(pattern.fullmatch("Sea.Token"))
+		self.assertIsNone(pattern.fullmatch("SeaXToken"))
+
+
+class SeacatCookieFilterTestCase(unittest.TestCase):
+	maxDiff = None
+
+	def setUp(self):
+		# Only the cookie name configuration is needed for filtering
+		self.CookieService = CookieService.__new__(CookieService)
+		self.CookieService.CookieName = "SeaCToken"
+		self.CookieService.CookieNamePattern = _cookie_name_pattern("SeaCToken")
+
+	def test_remove_seacat_cookies(self):
+		client_cookie = _derive_cookie_name("SeaCToken", "my-client")
+		cases = [
+			# No Seacat cookie, the header is passed on verbatim
+			("a=1;b=2", "a=1;b=2"),
+			("SeaCToken=abc", ""),
+			("SeaCToken=abc; other=1", "other=1"),
+			("other=1; {}=xyz; third=3".format(client_cookie), "other=1; third=3"),
+			("SeaCToken_ABC234=1;SeaCToken=2;other=3", "other=3"),
+			# Similar names of unrelated cookies are kept
+			("SeaCTokenX=1; SeaCToken_abc=2; mySeaCToken=3", "SeaCTokenX=1; SeaCToken_abc=2; mySeaCToken=3"),
+			("other=SeaCToken; SeaCToken_XYZ=4", "other=SeaCToken"),
+			(" SeaCToken = abc ;; other=1 ", "other=1"),
+		]
+		for cookie_string, expected in cases:
+			with self.subTest(cookie_string=cookie_string):
+				self.assertEqual(self.CookieService.remove_seacat_cookies_from_request(cookie_string), expected)
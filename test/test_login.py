@@ -0,0 +1,34 @@
+import unittest
+
+import asab.exceptions
+
+from seacatauth.authn.handler import _parse_login_query
+
+
+class LoginQueryTestCase(unittest.TestCase):
+	maxDiff = None
+
+	def test_parse_login_query(self):
+		custom_parameters = frozenset(["foo", "bar"])
+		cases = [
+			("", ({}, None)),
+			("foo=1&baz=2", ({"foo": "1"}, None)),
+			("foo=a%20b&bar=c+d", ({"foo": "a b", "bar": "c d"}, None)),
+			("ldid=abc&foo=1&ldid=def", ({"foo": "1"}, ("abc", "def"))),
+			("ldid=abc&ldid=abc", ({}, ("abc", "abc"))),
+			# Blank and valueless parameters are skipped
+			("foo=&bar&ldid=", ({}, None)),
+			("foo=&foo=2", ({"foo": "2"}, None)),
+			# Repeated parameters that are not login parameters are ignored
+			("baz=1&baz=2&foo=3", ({"foo": "3"}, None)),
+		]
+		for query_string, expected in cases:
+			with self.subTest(query_string=query_string):
+				self.assertEqual(_parse_login_query(query_string, custom_parameters), expected)
+
+	def test_parse_login_query_repeated(self):
+		custom_parameters = frozenset(["foo", "bar"])
+		for query_string in ("foo=1&foo=2", "bar=1&foo=2&bar=1"):
+			with self.subTest(query_string=query_string):
+				with self.assertRaises(asab.exceptions.ValidationError):
+					_parse_login_query(query_string, custom_parameters)
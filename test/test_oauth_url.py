@@ -1,6 +1,7 @@
 import unittest
 
 from seacatauth.client.service import validate_redirect_uri
+from seacatauth.generic import split_url_query, update_url_query_params
 
 
 class OAuthUriTestCase(unittest.TestCase):
@@ -109,3 +110,53 @@ class OAuthUriTestCase(unittest.TestCase):
 		# This should probably be False:
 		self.assertTrue(validate_redirect_uri(requested_uri, registered_uris, "prefix_match"))
 		self.assertTrue(validate_redirect_uri(requested_uri, registered_uris, "none"))
+
+
+class UrlQueryTestCase(unittest.TestCase):
+	maxDiff = None
+
+	def test_update_url_query_params(self):
+		cases = [
+			("https://app.test/cb", {"code": "c"}, "https://app.test/cb?code=c"),
+			("https://app.test/cb?x=1", {"state": "s"}, "https://app.test/cb?x=1&state=s"),
+			("https://app.test/cb?state=old&x=1", {"state": "new"}, "https://app.test/cb?state=new&x=1"),
+			# Fragment is kept, the parameters go to the query
+			("https://app.test/cb?x=1#frag", {"code": "c"}, "https://app.test/cb?x=1&code=c#frag"),
+			("https://app.test/#/login?x=1", {"state": "s"}, "https://app.test/?state=s#/login?x=1"),
+			# Blank values are dropped
+			("https://app.test/cb?x=&y=1", {"state": "s"}, "https://app.test/cb?y=1&state=s"),
+			(
+				"https://app.test/cb",
+				{"redirect_uri": "https://client.test/x?y=1#z"},
+				"https://app.test/cb?redirect_uri=https%3A%2F%2Fclient.test%2Fx%3Fy%3D1%23z",
+			),
+		]
+		for url, params, expected in cases:
+			with self.subTest(url=url, params=params):
+				self.assertEqual(update_url_query_params(url, **params), expected)
+
+	def test_update_url_query_params_repeated(self):
+		for url in ("https://app.test/cb?x=1&x=2", "https://app.test/cb?x=1&y=2&x=1#frag"):
+			with self.subTest(url=url):
+				with self.assertRaises(ValueError):
+					update_url_query_params(url, state="s")
+
+	def test_split_url_query(self):
+		cases = [
+			("https://app.test/cb", "/cb", (), ""),
+			("https://app.test/cb?x=1&x=2", "/cb", (("x", "1"), ("x", "2")), ""),
+			("https://app.test/cb?x=&y=1#frag", "/cb", (("y", "1"),), "frag"),
+			("https://app.test/#/login?a=1&b=2", "/", (), "/login?a=1&b=2"),
+		]
+		for url, path, query, fragment in cases:
+			with self.subTest(url=url):
+				parsed, pairs = split_url_query(url)
+				self.assertEqual(parsed.path, path)
+				self.assertEqual(pairs, query)
+				self.assertEqual(parsed.fragment, fragment)
+
+		# Login URIs with the query in the fragment are split once more
+		parsed, _ = split_url_query("https://app.test/#/login?a=1&b=2")
+		fragment_parsed, fragment_query = split_url_query(parsed.fragment)
+		self.assertEqual(fragment_parsed.path, "/login")
+		self.assertEqual(fragment_query, (("a", "1"), ("b", "2")))
@@ -0,0 +1,70 @@
+import unittest
+
+from seacatauth.authz.resource.service import ResourceService
+
+
+class _Cursor:
+
+	def __init__(self, docs):
+		self.Docs = docs
+
+	def sort(self, key, direction):
+		self.Docs = sorted(self.Docs, key=lambda d: d[key], reverse=direction < 0)
+		return self
+
+	def __aiter__(self):
+		return self._iterate()
+
+	async def _iterate(self):
+		for doc in self.Docs:
+			yield doc
+
+
+class _Collection:
+
+	def __init__(self, docs):
+		self.Docs = docs
+		self.Pipelines = []
+
+	def find(self, query_filter):
+		return _Cursor([dict(d) for d in self.Docs])
+
+	async def count_documents(self, query_filter):
+		return len(self.Docs)
+
+	def aggregate(self, pipeline):
+		self.Pipelines.append(pipeline)
+		facet = pipeline[-1]["$facet"]
+		skip, limit = facet["data"][0]["$skip"], facet["data"][1]["$limit"]
+		if limit <= 0:
+			raise ValueError("the limit must be positive")
+		docs = sorted(self.Docs, key=lambda d: d["_id"])
+		return _Cursor([{"data": docs[skip:skip + limit], "count": [{"n": len(docs)}]}])
+
+
+class _StorageService:
+
+	def __init__(self, collection):
+		self.Database = {ResourceService.ResourceCollection: collection}
+
+
+class ResourceListTestCase(unittest.IsolatedAsyncioTestCase):
+	maxDiff = None
+
+	def setUp(self):
+		self.Collection = _Collection([{"_id": "c:resource"}, {"_id": "a:resource"}, {"_id": "b:resource"}])
+		self.ResourceService = ResourceService.__new__(ResourceService)
+		self.ResourceService.StorageService = _StorageService(self.Collection)
+
+	async def test_list_unlimited(self):
+		for limit in (None, 0):
+			with self.subTest(limit=limit):
+				result = await self.ResourceService.list(page=0, limit=limit)
+				self.assertEqual(result["count"], 3)
+				self.assertEqual([r["_id"] for r in result["data"]], ["a:resource", "b:resource", "c:resource"])
+		self.assertEqual(self.Collection.Pipelines, [])
+
+	async def test_list_page(self):
+		result = await self.ResourceService.list(page=1, limit=2)
+		self.assertEqual(result["count"], 3)
+		self.assertEqual([r["_id"] for r in result["data"]], ["c:resource"])